@@ -0,0 +1,33 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from models import Class, Enrollment, UserRole
+
+def visible_class_ids(current_user):
+    """Subquery of the active classes a user can see: all for admins, taught ones for
+    teachers, enrolled ones for students."""
+    if current_user.role == UserRole.ADMIN:
+        return select(Class.id).where(Class.is_active == True)
+    if current_user.role == UserRole.TEACHER:
+        return select(Class.id).where(Class.teacher_id == current_user.id, Class.is_active == True)
+    return (
+        select(Enrollment.class_id)
+        .join(Class, Class.id == Enrollment.class_id)
+        .where(Enrollment.student_id == current_user.id, Class.is_active == True)
+    )
+
+async def get_managed_class(db, class_id: int, current_user, action: str = "manage"):
+    """Load a class the user may change (its teacher or an admin), or raise 404/403."""
+    class_obj = await db.get(Class, class_id)
+    if not class_obj or not class_obj.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Class not found"
+        )
+    
+    if current_user.role != UserRole.ADMIN and class_obj.teacher_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Not authorized to {action} this class"
+        )
+    
+    return class_obj
@@ -1,23 +1,71 @@
+import hashlib
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models import User
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    PRINCIPAL_CACHE_MAX_SIZE,
+    JWT_BACKEND,
+    JWT_CACHE_MAX_SIZE,
+)
+from cache import TTLCache
+from password_hashing import password_hasher
+
+try:
+    # PyJWT is optional; select it with JWT_BACKEND=pyjwt after comparing with benchmarks/jwt_verify.py
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+use_pyjwt = pyjwt is not None and JWT_BACKEND == "pyjwt"
+
+class CachedUser:
+    """Detached snapshot of a User row, safe to share between requests."""
+
+    __slots__ = ("id", "email", "full_name", "role", "is_active", "created_at", "updated_at")
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.email = user.email
+        self.full_name = user.full_name
+        self.role = user.role
+        self.is_active = user.is_active
+        self.created_at = user.created_at
+        self.updated_at = user.updated_at
+
+# Authenticated principals keyed by token subject (email)
+principal_cache = TTLCache(max_size=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+def invalidate_principal(*emails: str):
+    for email in emails:
+        if email:
+            principal_cache.delete(email)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -28,9 +76,25 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Verified token subjects keyed by token digest; entries expire exactly at the token's exp
+token_cache = TTLCache(max_size=JWT_CACHE_MAX_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def decode_token(token: str) -> dict:
+    if use_pyjwt:
+        try:
+            return pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except pyjwt.PyJWTError as e:
+            raise JWTError(str(e))
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 def verify_token(token: str):
+    token_key = hashlib.sha256(token.encode()).digest()
+    email = token_cache.get(token_key)
+    if email is not None:
+        return email
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -38,7 +102,6 @@ def verify_token(token: str):
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return email
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,25 +109,39 @@ def verify_token(token: str):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        token_cache.set(token_key, email, expires_at=expires_at)
+    else:
+        token_cache.set(token_key, email)
+    return email
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)):
     token = credentials.credentials
     email = verify_token(token)
-    user = db.query(User).filter(User.email == email).first()
+    cached_user = principal_cache.get(email)
+    if cached_user is not None:
+        return cached_user
+
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    cached_user = CachedUser(user)
+    principal_cache.set(email, cached_user)
+    return cached_user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 def require_roles(allowed_roles: list):
-    def role_checker(current_user: User = Depends(get_current_active_user)):
+    async def role_checker(current_user: User = Depends(get_current_active_user)):
         if current_user.role.value not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,67 @@
+"""
+Peak-memory benchmark for the streaming users export
+Seeds synthetic users into the configured database (if needed), streams the
+export through export_rows and samples resident memory after every chunk
+Run from the backend directory: python -m benchmarks.export_memory --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import time
+from sqlalchemy import func, insert, select
+from database import SessionLocal
+from models import User, UserRole
+from routers.exports import export_rows
+
+SEED_PREFIX = "bench-export-"
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def seed_users(rows: int, chunk: int = 10000):
+    db = SessionLocal()
+    try:
+        existing = db.execute(
+            select(func.count()).select_from(User).where(User.email.like(f"{SEED_PREFIX}%"))
+        ).scalar()
+        for start in range(existing, rows, chunk):
+            db.execute(insert(User), [
+                {
+                    "email": f"{SEED_PREFIX}{i}@example.com",
+                    "full_name": f"Benchmark Student {i}",
+                    "hashed_password": "not-a-real-hash",
+                    "role": UserRole.STUDENT,
+                    "is_active": True,
+                }
+                for i in range(start, min(start + chunk, rows))
+            ])
+            db.commit()
+        print(f"Seeded {max(rows - existing, 0)} users ({rows} benchmark users present)")
+    finally:
+        db.close()
+
+async def run_export(format: str):
+    baseline = current_rss_mb()
+    peak = baseline
+    total_bytes = 0
+    start = time.perf_counter()
+    async for chunk in export_rows("users", format):
+        total_bytes += len(chunk)
+        peak = max(peak, current_rss_mb())
+    elapsed = time.perf_counter() - start
+    print(f"{format}: {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s, "
+          f"RSS baseline {baseline:.1f} MB, peak {peak:.1f} MB (+{peak - baseline:.1f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    seed_users(args.rows)
+    asyncio.run(run_export("ndjson"))
+    asyncio.run(run_export("csv"))
+
+if __name__ == "__main__":
+    main()
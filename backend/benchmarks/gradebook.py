@@ -0,0 +1,110 @@
+"""
+Gradebook benchmark
+Seeds a class with --students enrolled students and --assignments assignments, about
+90% of cells submitted and most of those graded, then times building and serializing the gradebook
+(the work GET /assignments/gradebook/{class_id} does after the permission check).
+The seeded rows are removed afterwards.
+Run from the backend directory after `alembic upgrade head`:
+python -m benchmarks.gradebook [--students 300] [--assignments 40] [--runs 20]
+"""
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert
+import database
+from models import Assignment, Class, Enrollment, Submission, User, UserRole
+from schemas import Gradebook
+from routers.assignments import build_gradebook
+
+TARGET_MS = 100
+
+def seed(students: int, assignments: int) -> dict:
+    tag = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc)
+    with database.SessionLocal() as db:
+        teacher_id = db.execute(insert(User).values(
+            email=f"bench-teacher-{tag}@example.com", full_name="Bench Teacher",
+            hashed_password="x", role=UserRole.TEACHER,
+        ).returning(User.id)).scalar()
+        class_id = db.execute(insert(Class).values(
+            name=f"Gradebook benchmark {tag}", subject="Benchmark", teacher_id=teacher_id,
+        ).returning(Class.id)).scalar()
+        student_ids = db.execute(insert(User).returning(User.id), [
+            {
+                "email": f"bench-student-{tag}-{i}@example.com", "full_name": f"Student {i:04d}",
+                "hashed_password": "x", "role": UserRole.STUDENT,
+            }
+            for i in range(students)
+        ]).scalars().all()
+        db.execute(insert(Enrollment), [{"student_id": sid, "class_id": class_id} for sid in student_ids])
+        assignment_ids = db.execute(insert(Assignment).returning(Assignment.id), [
+            {
+                "title": f"Assignment {j}", "description": "Benchmark", "max_points": 100,
+                "due_date": now + timedelta(days=j - assignments // 2),
+                "class_id": class_id, "teacher_id": teacher_id,
+            }
+            for j in range(assignments)
+        ]).scalars().all()
+        db.execute(insert(Submission), [
+            {
+                "assignment_id": aid, "student_id": sid, "text_content": "answer",
+                "grade": random.randint(40, 100) if random.random() < 0.8 else None,
+            }
+            for aid in assignment_ids for sid in student_ids if random.random() < 0.9
+        ])
+        db.commit()
+    return {"class_id": class_id, "user_ids": [teacher_id, *student_ids], "assignment_ids": assignment_ids}
+
+def cleanup(seeded: dict):
+    with database.SessionLocal() as db:
+        db.execute(delete(Submission).where(Submission.assignment_id.in_(seeded["assignment_ids"])))
+        db.execute(delete(Assignment).where(Assignment.class_id == seeded["class_id"]))
+        db.execute(delete(Enrollment).where(Enrollment.class_id == seeded["class_id"]))
+        db.execute(delete(Class).where(Class.id == seeded["class_id"]))
+        db.execute(delete(User).where(User.id.in_(seeded["user_ids"])))
+        db.commit()
+
+async def timed_runs(class_id: int, runs: int):
+    # As the API's lifespan handler does at startup
+    gc.collect()
+    gc.freeze()
+    timings = []
+    async with database.session_scope() as db:
+        for _ in range(runs + 1):
+            start = time.perf_counter()
+            gradebook = await build_gradebook(db, class_id)
+            body = Gradebook.model_validate(gradebook).model_dump_json()
+            timings.append(time.perf_counter() - start)
+    # The first run warms the connection and statement caches
+    return timings[1:], gradebook, len(body)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--assignments", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    seeded = seed(args.students, args.assignments)
+    try:
+        timings, gradebook, size = asyncio.run(timed_runs(seeded["class_id"], args.runs))
+    finally:
+        cleanup(seeded)
+
+    cells = len(gradebook["students"]) * len(gradebook["assignments"])
+    timings.sort()
+    median_ms = statistics.median(timings) * 1000
+    p95_ms = timings[max(int(len(timings) * 0.95) - 1, 0)] * 1000
+    print(f"gradebook: {cells} cells, {size / 1024:.0f} KB of JSON")
+    print(f"build + serialize: median {median_ms:6.1f} ms, p95 {p95_ms:6.1f} ms (target < {TARGET_MS} ms)")
+    if p95_ms > TARGET_MS:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
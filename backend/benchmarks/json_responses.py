@@ -0,0 +1,110 @@
+"""
+JSON response serialization benchmark
+Serializes --rows users (ORM objects, as GET /users/ returns them) and class roster rows
+(mappings, as GET /classes/{id}/students returns them) these ways: FastAPI's response_model
+path (validation, jsonable_encoder and the stdlib JSON response), the same with orjson's
+response class, and serialization.dump_rows, which encodes the rows without validating them
+again, in pydantic-core or (JSON_BACKEND=orjson) in orjson. The orjson variants need orjson
+installed. No database is needed.
+Run from the backend directory: python -m benchmarks.json_responses [--rows 10000]
+"""
+import argparse
+import asyncio
+import gc
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models import User, UserRole
+from schemas import ClassStudent, User as UserSchema
+import serialization
+from serialization import dump_rows
+
+# dump_rows should at least halve the time of the response_model path
+TARGET_SPEEDUP = 2.0
+
+def make_users(rows: int) -> list:
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        User(
+            id=i, email=f"student{i}@example.com", full_name=f"Student Number {i}", hashed_password="x",
+            role=UserRole.STUDENT, is_active=True, created_at=created + timedelta(minutes=i), updated_at=None,
+        )
+        for i in range(rows)
+    ]
+
+def make_roster(rows: int) -> list:
+    enrolled = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {"id": i, "email": f"student{i}@example.com", "full_name": f"Student Number {i}",
+         "enrolled_at": enrolled + timedelta(minutes=i)}
+        for i in range(rows)
+    ]
+
+def fastapi_path(schema, response_class):
+    field = create_response_field(name="Response", type_=List[schema])
+
+    def serialize(content) -> bytes:
+        # What FastAPI does with a route's return value when response_model is set
+        encoded = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=True))
+        return response_class(encoded).body
+    return serialize
+
+def rows_path(schema, orjson_backend: bool):
+    def serialize(content) -> bytes:
+        serialization.use_orjson = orjson_backend
+        return dump_rows(schema, content)
+    return serialize
+
+def time_ms(serialize, content, repeats: int) -> float:
+    serialize(content)  # Builds validators and serializers on first use
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        serialize(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    cases = [
+        ("GET /users/", UserSchema, make_users(args.rows)),
+        ("GET /classes/{id}/students", ClassStudent, make_roster(args.rows)),
+    ]
+    gc.collect()
+    gc.freeze()
+    slowest = None
+    for name, schema, content in cases:
+        paths = [("response_model + json", fastapi_path(schema, JSONResponse))]
+        if serialization.orjson is not None:
+            from fastapi.responses import ORJSONResponse
+            paths.append(("response_model + orjson", fastapi_path(schema, ORJSONResponse)))
+        paths.append(("dump_rows", rows_path(schema, False)))
+        if serialization.orjson is not None:
+            paths.append(("dump_rows + orjson", rows_path(schema, True)))
+
+        print(f"{name}, {args.rows} rows")
+        baseline = None
+        for label, serialize in paths:
+            ms = time_ms(serialize, content, args.repeats)
+            baseline = baseline or ms
+            print(f"  {label:<24} {ms:8.1f} ms  {baseline / ms:5.1f}x")
+            if label.startswith("dump_rows"):
+                slowest = baseline / ms if slowest is None else min(slowest, baseline / ms)
+        if serialization.orjson is None:
+            print("  orjson not installed")
+
+    print(f"dump_rows speedup {slowest:.1f}x (target >= {TARGET_SPEEDUP}x)")
+    if slowest < TARGET_SPEEDUP:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
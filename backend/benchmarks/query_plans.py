@@ -0,0 +1,29 @@
+"""
+Query plan check for the hot lookups
+Runs EXPLAIN on each query with sequential scans discouraged and exits non-zero
+if the planner still has to fall back to a Seq Scan, i.e. an index is missing.
+tests/test_query_plans.py also checks which index each query uses.
+Run from the backend directory after `alembic upgrade head`: python -m benchmarks.query_plans
+"""
+import sys
+from sqlalchemy import text
+from database import engine
+from query_plans import HOT_QUERIES, explain, seq_scans
+
+def main():
+    failures = []
+    with engine.connect() as connection:
+        connection.execute(text("SET enable_seqscan = off"))
+        for name, statement in HOT_QUERIES.items():
+            scanned = list(seq_scans(explain(connection, statement)))
+            status = "❌ Seq Scan on " + ", ".join(scanned) if scanned else "✅ index"
+            print(f"{name:<36} {status}")
+            if scanned:
+                failures.append(name)
+
+    if failures:
+        print(f"\n{len(failures)} hot queries regressed to sequential scans")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
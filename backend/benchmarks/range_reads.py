@@ -0,0 +1,106 @@
+"""
+Range read benchmark
+Serves a large file from the local storage backend through a uvicorn worker and
+measures whole-file download throughput, sequential range reads (progressive
+playback) and random seeks (scrubbing)
+Run from the backend directory: python -m benchmarks.range_reads [--size-mb 512] [--range-kb 1024]
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def write_file(path: str, size: int):
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(size // len(block)):
+            f.write(block)
+        f.write(block[:size % len(block)])
+
+def start_server(storage_path: str, timeout: float = 30.0):
+    port = free_port()
+    env = dict(os.environ, STORAGE_BACKEND="local", LOCAL_STORAGE_PATH=storage_path, LOCAL_STORAGE_URL="/files")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return server, port
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError("Server did not start in time")
+
+def fetch(connection, path: str, byte_range=None) -> int:
+    headers = {"Range": f"bytes={byte_range[0]}-{byte_range[1]}"} if byte_range else {}
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    received = 0
+    while True:
+        chunk = response.read(1024 * 1024)
+        if not chunk:
+            break
+        received += len(chunk)
+    expected = 206 if byte_range else 200
+    if response.status != expected:
+        raise RuntimeError(f"Expected {expected}, got {response.status}")
+    return received
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--range-kb", type=int, default=1024)
+    parser.add_argument("--seeks", type=int, default=200)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    range_size = args.range_kb * 1024
+    with tempfile.TemporaryDirectory() as storage_path:
+        write_file(os.path.join(storage_path, "video.mp4"), size)
+        server, port = start_server(storage_path)
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            path = "/files/video.mp4"
+
+            start = time.perf_counter()
+            received = fetch(connection, path)
+            elapsed = time.perf_counter() - start
+            print(f"full download:      {received / elapsed / 1024 / 1024:8.1f} MB/s ({received} bytes)")
+
+            start = time.perf_counter()
+            received = 0
+            for offset in range(0, size, range_size):
+                received += fetch(connection, path, (offset, min(offset + range_size, size) - 1))
+            elapsed = time.perf_counter() - start
+            print(f"sequential ranges:  {received / elapsed / 1024 / 1024:8.1f} MB/s ({args.range_kb} KB per request)")
+
+            latencies = []
+            for _ in range(args.seeks):
+                offset = random.randrange(0, max(size - range_size, 1))
+                start = time.perf_counter()
+                fetch(connection, path, (offset, offset + range_size - 1))
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            print(f"random seeks:       median {statistics.median(latencies) * 1000:6.2f} ms, "
+                  f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:6.2f} ms")
+            connection.close()
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Search benchmark
+Seeds --notes notes spread over --users students, written from a Zipf-distributed vocabulary
+so some words are everywhere and most are rare, then times GET /search's query for random
+users and one- or two-word queries. The seeded rows are removed afterwards.
+Run from the backend directory after `alembic upgrade head`:
+python -m benchmarks.search [--notes 1000000] [--users 1000] [--queries 200]
+"""
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+from sqlalchemy import delete, insert, text
+import database
+from models import Note, User, UserRole
+from routers.search import SEARCH_KINDS, search
+
+TARGET_MS = 50
+VOCABULARY_SIZE = 20000
+BATCH_SIZE = 10000
+
+def make_vocabulary(rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return sorted(words)
+
+def seed(notes: int, users: int, vocabulary: list, rng: random.Random) -> list:
+    tag = uuid.uuid4().hex[:8]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    with database.SessionLocal() as db:
+        user_ids = db.execute(insert(User).returning(User.id), [
+            {
+                "email": f"bench-search-{tag}-{i}@example.com", "full_name": f"Search Student {i}",
+                "hashed_password": "x", "role": UserRole.STUDENT,
+            }
+            for i in range(users)
+        ]).scalars().all()
+        db.commit()
+
+        for offset in range(0, notes, BATCH_SIZE):
+            count = min(BATCH_SIZE, notes - offset)
+            words = rng.choices(vocabulary, weights, k=count * 64)
+            db.execute(insert(Note), [
+                {
+                    "title": " ".join(words[i * 64:i * 64 + 4]),
+                    "content": " ".join(words[i * 64 + 4:(i + 1) * 64]),
+                    "user_id": user_ids[(offset + i) % users],
+                }
+                for i in range(count)
+            ])
+            db.commit()
+            print(f"⏳ {offset + count}/{notes} notes seeded", end="\r")
+        print()
+        db.execute(text("ANALYZE notes"))
+        db.commit()
+    return user_ids
+
+def cleanup(user_ids: list):
+    with database.SessionLocal() as db:
+        db.execute(delete(Note).where(Note.user_id.in_(user_ids)))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+
+async def timed_queries(user_ids: list, vocabulary: list, queries: int, rng: random.Random):
+    gc.collect()
+    gc.freeze()
+    timings = []
+    async with database.session_scope() as db:
+        for _ in range(queries + 1):
+            user = SimpleNamespace(id=rng.choice(user_ids), role=UserRole.STUDENT)
+            # Common and rare words alike; a third of the queries combine two words
+            q = " ".join(rng.choice(vocabulary[:rng.choice([50, 2000, VOCABULARY_SIZE])])
+                         for _ in range(rng.choice([1, 1, 2])))
+            start = time.perf_counter()
+            await search(db, user, q, list(SEARCH_KINDS), 20)
+            timings.append(time.perf_counter() - start)
+    # The first query warms the connection and statement caches
+    return timings[1:]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng)
+    user_ids = seed(args.notes, args.users, vocabulary, rng)
+    try:
+        timings = asyncio.run(timed_queries(user_ids, vocabulary, args.queries, rng))
+    finally:
+        cleanup(user_ids)
+
+    timings.sort()
+    median_ms = statistics.median(timings) * 1000
+    p95_ms = timings[max(int(len(timings) * 0.95) - 1, 0)] * 1000
+    print(f"search over {args.notes} notes ({args.users} users): "
+          f"median {median_ms:6.1f} ms, p95 {p95_ms:6.1f} ms (target < {TARGET_MS} ms)")
+    if p95_ms > TARGET_MS:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Startup benchmark
+Measures how long `import main` takes and how long a fresh uvicorn worker takes
+to answer its first request on /health
+Run from the backend directory: python -m benchmarks.startup [--runs 5]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def import_seconds() -> float:
+    output = subprocess.check_output([
+        sys.executable, "-c",
+        "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)",
+    ])
+    return float(output.decode().strip().splitlines()[-1])
+
+def first_request_seconds(timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("Server did not answer /health in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = [import_seconds() for _ in range(args.runs)]
+    first_requests = [first_request_seconds() for _ in range(args.runs)]
+    print(f"import main:         median {statistics.median(imports) * 1000:7.1f} ms, max {max(imports) * 1000:7.1f} ms")
+    print(f"time to first /health: median {statistics.median(first_requests) * 1000:7.1f} ms, "
+          f"max {max(first_requests) * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import zlib
+from typing import Dict, Iterable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import (
+    COMPRESSION_ENCODINGS, COMPRESSION_MINIMUM_SIZE, COMPRESSION_CONTENT_TYPES,
+    COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY,
+)
+
+try:
+    # brotli is optional; without it only gzip is offered
+    import brotli
+except ImportError:
+    brotli = None
+
+# Server preference order, e.g. ["br", "gzip"], limited to what is installed
+ENCODINGS = [
+    encoding for encoding in (name.strip() for name in COMPRESSION_ENCODINGS.split(","))
+    if encoding == "gzip" or (encoding == "br" and brotli is not None)
+]
+
+def compressible(content_type: Optional[str]) -> bool:
+    """Allowlisted media types; an entry ending in "/" (e.g. "text/") allows the whole type."""
+    if not content_type:
+        return False
+    media_type = content_type.split(";")[0].strip().lower()
+    return any(
+        media_type.startswith(allowed) if allowed.endswith("/") else media_type == allowed
+        for allowed in COMPRESSION_CONTENT_TYPES
+    )
+
+def choose_encoding(accept_encoding: str, available: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """The first of our encodings the client accepts (q > 0), honouring "*" and "identity;q=0" alike."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+class Compressor:
+    """Incremental gzip or brotli; every chunk is flushed so streamed events arrive as they are sent."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+def precompress(body: bytes, content_type: str = "application/json") -> Dict[str, bytes]:
+    """Every offered encoding of a body that will be sent many times, e.g. a cached response."""
+    if len(body) < COMPRESSION_MINIMUM_SIZE or not compressible(content_type):
+        return {}
+    return {encoding: Compressor(encoding).compress(body, final=True) for encoding in ENCODINGS}
+
+def weak_etag(etag: str) -> str:
+    # A strong ETag names exact bytes; the compressed bytes differ, so they only share a weak one
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+def encoded_headers(headers: MutableHeaders, encoding: str):
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    if "etag" in headers:
+        headers["ETag"] = weak_etag(headers["etag"])
+
+class CompressionMiddleware:
+    """Compress responses of allowlisted types once they reach COMPRESSION_MINIMUM_SIZE.
+
+    Streaming responses are compressed chunk by chunk. Responses that are already encoded
+    (e.g. precompressed cache entries), partial (206) or empty pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not ENCODINGS:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or "content-range" in headers
+                    or not compressible(headers.get("content-type"))
+                )
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < COMPRESSION_MINIMUM_SIZE:
+                    passthrough = True
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                compressor = Compressor(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                encoded_headers(headers, encoding)
+                body = compressor.compress(body, final=not more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+            else:
+                body = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
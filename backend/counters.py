@@ -0,0 +1,74 @@
+import asyncio
+from sqlalchemy import func, select, update
+from database import session_scope
+from models import Assignment, Class, Enrollment, Submission, User
+from response_cache import invalidate_classes
+
+async def bump(db, model, row_id: int, **deltas):
+    """Add to counter columns in the caller's transaction, e.g. bump(db, Class, 7, student_count=1)."""
+    values = {name: getattr(model, name) + delta for name, delta in deltas.items() if delta}
+    if values:
+        await db.execute(update(model).where(model.id == row_id).values(values))
+
+def _graded(column):
+    # Aggregate over the graded submissions of a class
+    return (
+        select(func.coalesce(func.sum(column), 0))
+        .select_from(Submission)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .where(Assignment.class_id == Class.id, Submission.grade.isnot(None))
+        .scalar_subquery()
+    )
+
+# Each counter with the correlated query that computes its true value
+COUNTERS = [
+    (User, "class_count", select(func.count()).where(
+        Class.teacher_id == User.id, Class.is_active == True
+    ).scalar_subquery()),
+    (Class, "student_count", select(func.count()).where(
+        Enrollment.class_id == Class.id
+    ).scalar_subquery()),
+    (Class, "points_earned", _graded(Submission.grade)),
+    (Class, "points_possible", _graded(Assignment.max_points)),
+    (Assignment, "submission_count", select(func.count()).where(
+        Submission.assignment_id == Assignment.id
+    ).scalar_subquery()),
+    (Assignment, "graded_count", select(func.count()).where(
+        Submission.assignment_id == Assignment.id, Submission.grade.isnot(None)
+    ).scalar_subquery()),
+]
+
+async def reconcile_counters(db) -> dict:
+    """Recompute every counter and fix the rows that drifted. Returns rows repaired per counter.
+
+    A bump committed while this runs can still be overwritten by a value computed just
+    before it; the next run repairs that.
+    """
+    repaired = {}
+    for model, name, actual in COUNTERS:
+        column = getattr(model, name)
+        result = await db.execute(
+            update(model)
+            .where(column != actual)
+            .values({name: actual})
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+        row_ids = result.scalars().all()
+        await db.commit()
+        if model is Class and row_ids:
+            # Cached class responses still show the drifted values
+            await invalidate_classes(row_ids)
+        repaired[f"{model.__tablename__}.{name}"] = len(row_ids)
+    return repaired
+
+async def reconcile_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_scope() as db:
+                repaired = await reconcile_counters(db)
+            if any(repaired.values()):
+                print(f"Counter reconciliation repaired {repaired}")
+        except Exception as e:
+            print(f"Counter reconciliation error: {e}")
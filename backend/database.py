@@ -1,16 +1,196 @@
+import threading
+import time
+from contextlib import asynccontextmanager
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_MODE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
 
-engine = create_engine(DATABASE_URL)
+class PoolMetrics:
+    """Checkout latency and overflow counters shared by every pool this process creates."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+
+    def record_checkout(self, elapsed: float, in_overflow: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds_total += elapsed
+            self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+            if in_overflow:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "checkout_seconds_total": self.checkout_seconds_total,
+                "checkout_seconds_max": self.checkout_seconds_max,
+                "checkout_seconds_avg": self.checkout_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+pool_metrics = PoolMetrics()
+
+class TimedPoolMixin:
+    """Records how long each pool checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start, self.overflow() > 0)
+        return connection
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+pool_options = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+# The sync engine is always available for scripts such as setup_db.py
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# DB_MODE=async serves requests from asyncpg; DB_MODE=sync keeps psycopg2 on the threadpool
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=TimedAsyncAdaptedQueuePool, **pool_options)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+class ThreadedSession:
+    """Async facade over a sync Session that runs each database call on the threadpool.
+
+    Mirrors the subset of the AsyncSession API the routers use, so the same async
+    handlers run in both DB_MODE=sync and DB_MODE=async.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def _execute(self, statement, params=None, execution_options=None, **kw):
+        # Buffer rows while still on the worker thread, as AsyncSession does
+        options = dict(execution_options or {}, prebuffer_rows=True)
+        return self.sync_session.execute(statement, params, execution_options=options, **kw)
+
+    async def execute(self, statement, params=None, **kw):
+        return await run_in_threadpool(self._execute, statement, params, **kw)
+
+    async def scalar(self, statement, params=None, **kw):
+        result = await self.execute(statement, params, **kw)
+        return result.scalar()
+
+    async def scalars(self, statement, params=None, **kw):
+        result = await self.execute(statement, params, **kw)
+        return result.scalars()
+
+    async def get(self, entity, ident, **kw):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kw)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+@asynccontextmanager
+async def session_scope():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(SessionLocal(expire_on_commit=False))
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+async def get_db():
+    async with session_scope() as db:
+        yield db
+
+async def stream_partitions(db, statement, size: int = 1000):
+    """Yield result rows as mappings in partitions of ``size`` using a server-side cursor."""
+    statement = statement.execution_options(yield_per=size)
+    if isinstance(db, ThreadedSession):
+        result = await run_in_threadpool(db.sync_session.execute, statement)
+        mappings = result.mappings()
+        while True:
+            rows = await run_in_threadpool(mappings.fetchmany, size)
+            if not rows:
+                break
+            yield rows
+        return
+
+    result = await db.stream(statement)
+    async for rows in result.mappings().partitions(size):
+        yield rows
+
+def pool_stats(pool=None) -> dict:
+    if pool is None:
+        pool = async_engine.pool if async_engine is not None else engine.pool
+    stats = {
+        "size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    stats.update(pool_metrics.stats())
+    return stats
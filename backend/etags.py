@@ -0,0 +1,31 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+from serialization import dumps
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match: W/ prefixes are ignored
+    candidates = [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+def etag_response(request: Request, body: bytes, etag: str, headers: Optional[dict] = None) -> Response:
+    """Send a JSON body under a known ETag; 304 when the client's copy matches."""
+    headers = dict(headers or {}, ETag=etag)
+    # Clients may keep the response but must revalidate it on every use
+    headers.setdefault("Cache-Control", "private, no-cache")
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def etag_json_response(request: Request, content, headers: Optional[dict] = None) -> Response:
+    """Serialize content to JSON with an ETag of the body; 304 when the client's copy matches."""
+    body = dumps(content)
+    return etag_response(request, body, etag_for(body), headers)
@@ -1,35 +1,69 @@
-import firebase_admin
-from firebase_admin import credentials, storage
-from typing import Optional
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
 import os
-from config import FIREBASE_CREDENTIALS_PATH
+import threading
+import time
+from cache import TTLCache
+from config import (
+    FIREBASE_CREDENTIALS_PATH,
+    FIREBASE_STORAGE_BUCKET,
+    UPLOAD_CHUNK_SIZE,
+    SIGNED_URL_EXPIRY_SECONDS,
+    SIGNED_URL_REFRESH_MARGIN_SECONDS,
+    SIGNED_URL_CACHE_MAX_SIZE,
+)
+from storage import StorageBackend
 import uuid
 
-class FirebaseStorage:
+class FirebaseStorage(StorageBackend):
+    # The Firebase SDK is imported and initialized on first use rather than at import
+    # time, so API workers and scripts that never touch storage start quickly.
     def __init__(self):
-        self.initialized = False
+        self._initialized = None
+        self._lock = threading.Lock()
         self.bucket = None
-        self._initialize()
+        # Signed URLs are reused until SIGNED_URL_REFRESH_MARGIN_SECONDS before they expire
+        self.url_cache = TTLCache(max_size=SIGNED_URL_CACHE_MAX_SIZE, ttl=SIGNED_URL_EXPIRY_SECONDS)
+        self._stats_lock = threading.Lock()
+        self.signatures = 0
+        self.signing_seconds_total = 0.0
+        self.signing_seconds_max = 0.0
+
+    @property
+    def initialized(self) -> bool:
+        if self._initialized is None:
+            with self._lock:
+                if self._initialized is None:
+                    self._initialize()
+        return self._initialized
 
     def _initialize(self):
         try:
+            import firebase_admin
+            from firebase_admin import credentials, storage
+
             if not firebase_admin._apps:
+                if not FIREBASE_STORAGE_BUCKET:
+                    print("Warning: FIREBASE_STORAGE_BUCKET is not set. Please configure Firebase.")
+                    self._initialized = False
+                    return
                 if os.path.exists(FIREBASE_CREDENTIALS_PATH):
                     cred = credentials.Certificate(FIREBASE_CREDENTIALS_PATH)
                     firebase_admin.initialize_app(cred, {
-                        'storageBucket': 'your-firebase-project.appspot.com'  # Replace with your bucket
+                        'storageBucket': FIREBASE_STORAGE_BUCKET
                     })
                 else:
                     # For development, you can use default credentials
                     # Make sure to set up Firebase properly in production
                     print("Warning: Firebase credentials not found. Please configure Firebase.")
+                    self._initialized = False
                     return
 
             self.bucket = storage.bucket()
-            self.initialized = True
+            self._initialized = True
         except Exception as e:
             print(f"Firebase initialization error: {e}")
-            self.initialized = False
+            self._initialized = False
 
     def upload_file(self, file_content: bytes, file_name: str, content_type: str = None) -> Optional[str]:
         if not self.initialized:
@@ -53,6 +87,30 @@ class FirebaseStorage:
             print(f"File upload error: {e}")
             return None
 
+    def store_file(self, path: str, blob_name: str, content_type: str = None) -> Optional[str]:
+        if not self.initialized:
+            return None
+        
+        try:
+            blob = self.bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
+            blob.upload_from_filename(path, content_type=content_type)
+            blob.make_public()
+            
+            return blob.public_url
+        except Exception as e:
+            print(f"File upload error: {e}")
+            return None
+
+    def exists(self, blob_name: str) -> bool:
+        if not self.initialized:
+            return False
+        
+        try:
+            return self.bucket.blob(blob_name).exists()
+        except Exception as e:
+            print(f"File lookup error: {e}")
+            return False
+
     def delete_file(self, file_url: str) -> bool:
         if not self.initialized:
             return False
@@ -62,23 +120,56 @@ class FirebaseStorage:
             blob_name = file_url.split('/')[-1]
             blob = self.bucket.blob(blob_name)
             blob.delete()
+            self.url_cache.delete(blob_name)
             return True
         except Exception as e:
             print(f"File deletion error: {e}")
             return False
 
+    def _sign(self, file_path: str) -> str:
+        expires_at = time.time() + SIGNED_URL_EXPIRY_SECONDS
+        start = time.perf_counter()
+        url = self.bucket.blob(file_path).generate_signed_url(
+            expiration=timedelta(seconds=SIGNED_URL_EXPIRY_SECONDS)
+        )
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.signatures += 1
+            self.signing_seconds_total += elapsed
+            self.signing_seconds_max = max(self.signing_seconds_max, elapsed)
+        self.url_cache.set(file_path, url, expires_at=expires_at - SIGNED_URL_REFRESH_MARGIN_SECONDS)
+        return url
+
     def get_download_url(self, file_path: str) -> Optional[str]:
-        if not self.initialized:
-            return None
-        
-        try:
-            blob = self.bucket.blob(file_path)
-            # Generate a signed URL that expires in 1 hour
-            url = blob.generate_signed_url(expiration=3600)
-            return url
-        except Exception as e:
-            print(f"URL generation error: {e}")
-            return None
+        return self.get_download_urls([file_path])[file_path]
+
+    def get_download_urls(self, file_paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Signed URLs for several blobs at once; only paths missing from the cache are signed."""
+        urls = {}
+        for file_path in file_paths:
+            if file_path not in urls:
+                urls[file_path] = self.url_cache.get(file_path)
+
+        missing = [file_path for file_path, url in urls.items() if url is None]
+        if not missing or not self.initialized:
+            return urls
+
+        for file_path in missing:
+            try:
+                urls[file_path] = self._sign(file_path)
+            except Exception as e:
+                print(f"URL generation error: {e}")
+        return urls
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            signing = {
+                "signatures": self.signatures,
+                "signing_seconds_total": self.signing_seconds_total,
+                "signing_seconds_max": self.signing_seconds_max,
+                "signing_seconds_avg": self.signing_seconds_total / self.signatures if self.signatures else 0.0,
+            }
+        return {"signed_url_cache": self.url_cache.stats(), "signing": signing}
 
 # Global instance
 firebase_storage = FirebaseStorage()
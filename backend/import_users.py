@@ -0,0 +1,38 @@
+"""
+Bulk user import script
+Creates accounts from a CSV (email, full_name, role, password) or JSON file
+Usage: python import_users.py users.csv [--batch-size 500]
+"""
+import argparse
+import asyncio
+from database import session_scope
+from user_import import parse_users, import_users, shutdown_hash_pool
+from config import USER_IMPORT_BATCH_SIZE
+
+async def run(path: str, batch_size: int):
+    with open(path, "rb") as f:
+        rows = parse_users(f.read(), path)
+
+    async with session_scope() as db:
+        async for event in import_users(db, rows, batch_size):
+            if event["event"] == "progress":
+                print(f"⏳ {event['processed']}/{event['total']} processed, {event['created']} created")
+            else:
+                print(f"✅ Import finished: {event['created']} created, "
+                      f"{event['skipped_existing']} already registered, "
+                      f"{event['duplicates']} duplicates, {event['invalid']} invalid")
+                for error in event["errors"]:
+                    print(f"   Row {error['row']} ({error['email']}): {error['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Import users from CSV or JSON")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=USER_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.path, args.batch_size))
+    finally:
+        shutdown_hash_pool()
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,49 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import IntegrityError
-from config import CORS_ORIGINS
-from database import engine, Base
-from routers import auth, users, classes
-from models import Base
+from config import CORS_ORIGINS, STORAGE_BACKEND, COUNTER_RECONCILE_INTERVAL
+from database import engine, async_engine, pool_stats
+from routers import auth, users, classes, exports, files, materials, assignments, dashboard, calendar, search, live_sessions
+from password_hashing import password_hasher
+from auth import principal_cache, token_cache, require_roles
+from pagination import NEXT_CURSOR_HEADER
+from response_cache import response_cache
+from serialization import DefaultJSONResponse
+from compression import CompressionMiddleware
+from user_import import shutdown_hash_pool
+from storage import get_storage
+from counters import reconcile_periodically
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic (`python migrate.py` runs as a release step),
+# so workers start without touching the database; connections open on first use.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reconciler = None
+    if COUNTER_RECONCILE_INTERVAL > 0:
+        reconciler = asyncio.create_task(reconcile_periodically(COUNTER_RECONCILE_INTERVAL))
+    yield
+    if reconciler is not None:
+        reconciler.cancel()
+    password_hasher.shutdown()
+    shutdown_hash_pool()
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
 
 app = FastAPI(
     title="Nexus Learning API by Reactor Minds",
     description="Modern Learning Management Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse
 )
 
+# Compress large JSON, NDJSON, CSV and calendar responses
+app.add_middleware(CompressionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,12 +51,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Accept-Ranges", "Content-Range", "ETag"],
 )
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(classes.router)
+app.include_router(exports.router)
+app.include_router(materials.router)
+app.include_router(assignments.router)
+app.include_router(dashboard.router)
+app.include_router(calendar.router)
+app.include_router(search.router)
+app.include_router(live_sessions.router)
+
+# Stored files are served by the API itself only when they live on local disk
+if STORAGE_BACKEND == "local":
+    app.include_router(files.router)
 
 @app.get("/")
 def read_root():
@@ -43,6 +83,18 @@ def read_root():
 def health_check():
     return {"status": "healthy", "service": "Nexus Learning by Reactor Minds"}
 
+# Pool sizes, queue depths and cache statistics are operational details, so admins only
+@app.get("/metrics", dependencies=[Depends(require_roles(["admin"]))])
+def metrics():
+    return {
+        "database_pool": pool_stats(),
+        "password_hashing": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "storage": get_storage().stats(),
+    }
+
 # Global exception handler
 @app.exception_handler(IntegrityError)
 async def integrity_error_handler(request, exc):
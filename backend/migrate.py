@@ -0,0 +1,27 @@
+"""
+Database migration script
+Brings the schema up to date with the Alembic migrations; every deploy runs it before
+the web process starts (Procfile release, Railway preDeployCommand)
+Usage: python migrate.py
+"""
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from database import engine
+
+def upgrade_database(alembic_config: Config = None):
+    """Stamp a schema created before migrations existed, then upgrade to head"""
+    alembic_config = alembic_config or Config("alembic.ini")
+    table_names = inspect(engine).get_table_names()
+    if "users" in table_names and "alembic_version" not in table_names:
+        # Schema was created by Base.metadata.create_all, which matches migration 0001
+        command.stamp(alembic_config, "0001")
+        print("✅ Existing schema marked as migration 0001")
+    command.upgrade(alembic_config, "head")
+    print("✅ Database schema is up to date")
+
+def main():
+    upgrade_database()
+
+if __name__ == "__main__":
+    main()
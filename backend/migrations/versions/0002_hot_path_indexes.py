@@ -0,0 +1,65 @@
+"""hot path indexes
+
+Composite and partial indexes for the lookups the routers actually run, plus
+the (student_id, class_id) uniqueness that bulk enrollment relies on.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the oldest row of any duplicated enrollment before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM enrollments e
+        USING enrollments keep
+        WHERE e.student_id = keep.student_id
+          AND e.class_id = keep.class_id
+          AND e.id > keep.id
+        """
+    )
+    # Enrollment by student (and the student+class existence check)
+    op.create_unique_constraint("uq_enrollments_student_class", "enrollments", ["student_id", "class_id"])
+    # Enrollment by class (rosters, per-class counts)
+    op.create_index("ix_enrollments_class_id_student_id", "enrollments", ["class_id", "student_id"])
+    # Active classes by teacher
+    op.create_index(
+        "ix_classes_teacher_id_active", "classes", ["teacher_id"],
+        postgresql_where=sa.text("is_active"),
+    )
+    op.create_index("ix_assignments_class_id_due_date", "assignments", ["class_id", "due_date"])
+    # Submissions by assignment (and a student's submission for an assignment)
+    op.create_index("ix_submissions_assignment_id_student_id", "submissions", ["assignment_id", "student_id"])
+    op.create_index("ix_submissions_student_id", "submissions", ["student_id"])
+    # Calendar events by user and time
+    op.create_index("ix_calendar_events_user_id_start_time", "calendar_events", ["user_id", "start_time"])
+    op.create_index("ix_materials_class_id_uploaded_at", "materials", ["class_id", "uploaded_at"])
+    op.create_index("ix_live_sessions_class_id_scheduled_start", "live_sessions", ["class_id", "scheduled_start"])
+    op.create_index("ix_notes_user_id", "notes", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notes_user_id", table_name="notes")
+    op.drop_index("ix_live_sessions_class_id_scheduled_start", table_name="live_sessions")
+    op.drop_index("ix_materials_class_id_uploaded_at", table_name="materials")
+    op.drop_index("ix_calendar_events_user_id_start_time", table_name="calendar_events")
+    op.drop_index("ix_submissions_student_id", table_name="submissions")
+    op.drop_index("ix_submissions_assignment_id_student_id", table_name="submissions")
+    op.drop_index("ix_assignments_class_id_due_date", table_name="assignments")
+    op.drop_index("ix_classes_teacher_id_active", table_name="classes")
+    op.drop_index("ix_enrollments_class_id_student_id", table_name="enrollments")
+    op.drop_constraint("uq_enrollments_student_class", "enrollments", type_="unique")
@@ -0,0 +1,44 @@
+"""stored blobs
+
+Content-addressed file storage: one reference-counted row per distinct upload,
+and the link from each material to the blob it uses.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stored_blobs",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("file_url", sa.String(), nullable=False),
+        sa.Column("file_size", sa.BigInteger(), nullable=True),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("ref_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("content_hash"),
+    )
+    op.add_column("materials", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        "materials_content_hash_fkey", "materials", "stored_blobs", ["content_hash"], ["content_hash"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("materials_content_hash_fkey", "materials", type_="foreignkey")
+    op.drop_column("materials", "content_hash")
+    op.drop_table("stored_blobs")
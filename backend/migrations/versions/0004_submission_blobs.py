@@ -0,0 +1,32 @@
+"""submission blobs
+
+Submitted files are stored by content hash like materials.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("submissions", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        "submissions_content_hash_fkey", "submissions", "stored_blobs", ["content_hash"], ["content_hash"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("submissions_content_hash_fkey", "submissions", type_="foreignkey")
+    op.drop_column("submissions", "content_hash")
@@ -0,0 +1,75 @@
+"""counters
+
+Materialized dashboard counters on users, classes and assignments, backfilled
+from the current enrollments and submissions.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = {
+    "users": ["class_count"],
+    "classes": ["student_count", "points_earned", "points_possible"],
+    "assignments": ["submission_count", "graded_count"],
+}
+
+
+def upgrade() -> None:
+    for table, columns in COUNTERS.items():
+        for column in columns:
+            op.add_column(table, sa.Column(column, sa.Integer(), server_default="0", nullable=False))
+
+    op.execute(
+        """
+        UPDATE users SET class_count = (
+            SELECT count(*) FROM classes WHERE classes.teacher_id = users.id AND classes.is_active
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE classes SET
+            student_count = (SELECT count(*) FROM enrollments WHERE enrollments.class_id = classes.id),
+            points_earned = (
+                SELECT coalesce(sum(submissions.grade), 0)
+                FROM submissions JOIN assignments ON assignments.id = submissions.assignment_id
+                WHERE assignments.class_id = classes.id AND submissions.grade IS NOT NULL
+            ),
+            points_possible = (
+                SELECT coalesce(sum(assignments.max_points), 0)
+                FROM submissions JOIN assignments ON assignments.id = submissions.assignment_id
+                WHERE assignments.class_id = classes.id AND submissions.grade IS NOT NULL
+            )
+        """
+    )
+    op.execute(
+        """
+        UPDATE assignments SET
+            submission_count = (
+                SELECT count(*) FROM submissions WHERE submissions.assignment_id = assignments.id
+            ),
+            graded_count = (
+                SELECT count(*) FROM submissions
+                WHERE submissions.assignment_id = assignments.id AND submissions.grade IS NOT NULL
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    for table, columns in COUNTERS.items():
+        for column in columns:
+            op.drop_column(table, column)
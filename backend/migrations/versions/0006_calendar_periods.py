@@ -0,0 +1,46 @@
+"""calendar periods
+
+Recurrence rules on calendar events, with the end of each series stored so a window
+lookup is one range-overlap check, and GiST indexes over the event and live session
+periods. The indexes pair the owning id with the range, which needs btree_gist.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column("calendar_events", sa.Column("recurrence_rule", sa.String(), nullable=True))
+    op.add_column("calendar_events", sa.Column("series_end", sa.DateTime(timezone=True), nullable=True))
+    # Existing events are single occurrences
+    op.execute("UPDATE calendar_events SET series_end = end_time")
+    op.create_index(
+        "ix_calendar_events_user_id_period", "calendar_events",
+        ["user_id", sa.text("tstzrange(start_time, series_end, '[]')")], postgresql_using="gist"
+    )
+    op.create_index(
+        "ix_live_sessions_class_id_period", "live_sessions",
+        ["class_id", sa.text("tstzrange(scheduled_start, scheduled_end, '[)')")], postgresql_using="gist"
+    )
+
+
+def downgrade() -> None:
+    # btree_gist is left installed; other objects may depend on it
+    op.drop_index("ix_live_sessions_class_id_period", table_name="live_sessions")
+    op.drop_index("ix_calendar_events_user_id_period", table_name="calendar_events")
+    op.drop_column("calendar_events", "series_end")
+    op.drop_column("calendar_events", "recurrence_rule")
@@ -0,0 +1,57 @@
+"""search vectors
+
+Generated tsvector columns on notes, materials and classes, weighted title first, with
+GIN indexes. PostgreSQL keeps the columns current on every write; adding them rewrites
+each table once. Notes are always searched per user, so their index leads with user_id
+(btree_gin).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Table -> (column, weight) pairs, most important first
+SEARCH_COLUMNS = {
+    "notes": [("title", "A"), ("content", "B")],
+    "materials": [("title", "A"), ("description", "B")],
+    "classes": [("name", "A"), ("subject", "B"), ("description", "C")],
+}
+
+
+def search_vector(columns) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('english'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    for table, columns in SEARCH_COLUMNS.items():
+        op.add_column(table, sa.Column(
+            "search_vector", postgresql.TSVECTOR(), sa.Computed(search_vector(columns), persisted=True)
+        ))
+    op.create_index("ix_notes_user_id_search", "notes", ["user_id", "search_vector"], postgresql_using="gin")
+    op.create_index("ix_materials_search", "materials", ["search_vector"], postgresql_using="gin")
+    op.create_index("ix_classes_search", "classes", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_classes_search", table_name="classes")
+    op.drop_index("ix_materials_search", table_name="materials")
+    op.drop_index("ix_notes_user_id_search", table_name="notes")
+    for table in SEARCH_COLUMNS:
+        op.drop_column(table, "search_vector")
@@ -0,0 +1,43 @@
+"""live session conflicts
+
+Sessions must end after they start, and a class can't hold two sessions at once: an
+exclusion constraint over (period, class_id) replaces the calendar's GiST index, whose
+lookups its own index now serves. Upcoming sessions are read per class in end order.
+Existing overlapping sessions in one class must be moved before upgrading.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_check_constraint("live_sessions_end_after_start", "live_sessions", "scheduled_end > scheduled_start")
+    op.execute(
+        "ALTER TABLE live_sessions ADD CONSTRAINT live_sessions_no_overlap EXCLUDE USING gist "
+        "(tstzrange(scheduled_start, scheduled_end, '[)') WITH &&, class_id WITH =)"
+    )
+    op.drop_index("ix_live_sessions_class_id_period", table_name="live_sessions")
+    op.create_index("ix_live_sessions_class_id_scheduled_end", "live_sessions", ["class_id", "scheduled_end"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_live_sessions_class_id_scheduled_end", table_name="live_sessions")
+    op.create_index(
+        "ix_live_sessions_class_id_period", "live_sessions",
+        ["class_id", sa.text("tstzrange(scheduled_start, scheduled_end, '[)')")], postgresql_using="gist"
+    )
+    op.drop_constraint("live_sessions_no_overlap", "live_sessions")
+    op.drop_constraint("live_sessions_end_after_start", "live_sessions", type_="check")
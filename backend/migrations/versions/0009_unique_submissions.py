@@ -0,0 +1,57 @@
+"""unique submissions
+
+A student has one submission per assignment, which resubmitting replaces: a unique
+constraint on (assignment_id, student_id) lets concurrent submits insert with ON CONFLICT
+instead of each adding a row. It replaces the plain index on the same columns.
+Duplicates are removed first, keeping each student's latest submission as the API did;
+the counters they inflated are repaired by the next counter reconciliation.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the latest row of any duplicated submission, releasing the files of the others
+    op.execute(
+        """
+        WITH dropped AS (
+            DELETE FROM submissions s
+            USING submissions keep
+            WHERE s.assignment_id = keep.assignment_id
+              AND s.student_id = keep.student_id
+              AND (COALESCE(s.submitted_at, '-infinity'), s.id)
+                < (COALESCE(keep.submitted_at, '-infinity'), keep.id)
+            RETURNING s.content_hash
+        )
+        UPDATE stored_blobs b
+        SET ref_count = b.ref_count - released.count
+        FROM (
+            SELECT content_hash, count(*) AS count FROM dropped
+            WHERE content_hash IS NOT NULL GROUP BY content_hash
+        ) released
+        WHERE b.content_hash = released.content_hash
+        """
+    )
+    op.create_unique_constraint(
+        "uq_submissions_assignment_student", "submissions", ["assignment_id", "student_id"]
+    )
+    op.drop_index("ix_submissions_assignment_id_student_id", table_name="submissions")
+
+
+def downgrade() -> None:
+    op.create_index("ix_submissions_assignment_id_student_id", "submissions", ["assignment_id", "student_id"])
+    op.drop_constraint("uq_submissions_assignment_student", "submissions", type_="unique")
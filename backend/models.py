@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Boolean, ForeignKey, Enum, Index, UniqueConstraint, CheckConstraint, DDL, event, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -21,6 +22,9 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Maintained by counters.bump and repaired by counters.reconcile_counters
+    class_count = Column(Integer, nullable=False, default=0, server_default="0")  # Active classes taught
+
     # Relationships
     taught_classes = relationship("Class", foreign_keys="Class.teacher_id", back_populates="teacher")
     enrolled_classes = relationship("Enrollment", back_populates="student")
@@ -31,6 +35,9 @@ class User(Base):
 
 class Class(Base):
     __tablename__ = "classes"
+    __table_args__ = (
+        Index("ix_classes_teacher_id_active", "teacher_id", postgresql_where=text("is_active")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -41,6 +48,15 @@ class Class(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Maintained by counters.bump and repaired by counters.reconcile_counters
+    student_count = Column(Integer, nullable=False, default=0, server_default="0")
+    points_earned = Column(Integer, nullable=False, default=0, server_default="0")  # Sum of grades given
+    points_possible = Column(Integer, nullable=False, default=0, server_default="0")  # Their max_points
+
+    @property
+    def average_percent(self):
+        return round(100 * self.points_earned / self.points_possible, 2) if self.points_possible else None
+
     # Relationships
     teacher = relationship("User", foreign_keys=[teacher_id], back_populates="taught_classes")
     enrollments = relationship("Enrollment", back_populates="class_")
@@ -50,6 +66,10 @@ class Class(Base):
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        UniqueConstraint("student_id", "class_id", name="uq_enrollments_student_class"),
+        Index("ix_enrollments_class_id_student_id", "class_id", "student_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -62,6 +82,9 @@ class Enrollment(Base):
 
 class Material(Base):
     __tablename__ = "materials"
+    __table_args__ = (
+        Index("ix_materials_class_id_uploaded_at", "class_id", "uploaded_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -69,14 +92,29 @@ class Material(Base):
     file_url = Column(String, nullable=False)  # Firebase Storage URL
     file_type = Column(String, nullable=False)  # pdf, video, image, etc.
     file_size = Column(Integer)  # Size in bytes
+    content_hash = Column(String(64), ForeignKey("stored_blobs.content_hash"))  # Null for pre-dedup uploads
     class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     class_ = relationship("Class", back_populates="materials")
 
+class StoredBlob(Base):
+    # One row per distinct uploaded file, keyed by the SHA-256 of its contents
+    __tablename__ = "stored_blobs"
+
+    content_hash = Column(String(64), primary_key=True)
+    file_url = Column(String, nullable=False)
+    file_size = Column(BigInteger)
+    content_type = Column(String)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Assignment(Base):
     __tablename__ = "assignments"
+    __table_args__ = (
+        Index("ix_assignments_class_id_due_date", "class_id", "due_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -87,6 +125,14 @@ class Assignment(Base):
     teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Maintained by counters.bump and repaired by counters.reconcile_counters
+    submission_count = Column(Integer, nullable=False, default=0, server_default="0")
+    graded_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    @property
+    def pending_count(self):
+        return self.submission_count - self.graded_count
+
     # Relationships
     class_ = relationship("Class", back_populates="assignments")
     teacher = relationship("User", back_populates="assignments_created")
@@ -94,11 +140,16 @@ class Assignment(Base):
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        UniqueConstraint("assignment_id", "student_id", name="uq_submissions_assignment_student"),
+        Index("ix_submissions_student_id", "student_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=False)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     file_url = Column(String)  # Firebase Storage URL
+    content_hash = Column(String(64), ForeignKey("stored_blobs.content_hash"))
     text_content = Column(Text)
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
     grade = Column(Integer)  # Points earned
@@ -110,6 +161,18 @@ class Submission(Base):
 
 class LiveSession(Base):
     __tablename__ = "live_sessions"
+    __table_args__ = (
+        Index("ix_live_sessions_class_id_scheduled_start", "class_id", "scheduled_start"),
+        # Sessions in a class never overlap, so within a class this is also start order
+        Index("ix_live_sessions_class_id_scheduled_end", "class_id", "scheduled_end"),
+        # A class can't hold two sessions at once. Its GiST index, period first, also serves the
+        # overlap (&&) searches of the calendar feed and conflict checks; needs btree_gist
+        ExcludeConstraint(
+            (text("tstzrange(scheduled_start, scheduled_end, '[)')"), "&&"), ("class_id", "="),
+            name="live_sessions_no_overlap", using="gist"
+        ).ddl_if(dialect="postgresql"),
+        CheckConstraint("scheduled_end > scheduled_start", name="live_sessions_end_after_start"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -128,6 +191,9 @@ class LiveSession(Base):
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_user_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -142,6 +208,14 @@ class Note(Base):
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
+    __table_args__ = (
+        Index("ix_calendar_events_user_id_start_time", "user_id", "start_time"),
+        # Closed at both ends so zero-length events still match their instant
+        Index(
+            "ix_calendar_events_user_id_period", "user_id",
+            text("tstzrange(start_time, series_end, '[]')"), postgresql_using="gist"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -151,7 +225,38 @@ class CalendarEvent(Base):
     event_type = Column(String, nullable=False)  # assignment, live_session, personal, etc.
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     reference_id = Column(Integer)  # ID of related assignment, session, etc.
+    recurrence_rule = Column(String)  # RRULE subset, e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10
+    series_end = Column(DateTime(timezone=True))  # End of the last occurrence; NULL if the series never ends
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     user = relationship("User", back_populates="calendar_events")
+
+# Full-text search. On PostgreSQL each table below has a generated search_vector column with
+# a GIN index (migration 0007); it is left out of the models so rows load without it.
+# SQLite, for local testing, gets an FTS5 index over the same columns, kept current by triggers.
+SEARCH_COLUMNS = {
+    "notes": ("title", "content"),
+    "materials": ("title", "description"),
+    "classes": ("name", "subject", "description"),
+}
+
+def _fts5_ddl(table_name: str, columns) -> list:
+    fts = f"{table_name}_fts"
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    remove = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    add = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table_name}', content_rowid='id')",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table_name} BEGIN {add} END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table_name} BEGIN {remove} END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {table_name} BEGIN {remove} {add} END",
+    ]
+
+for _table_name, _columns in SEARCH_COLUMNS.items():
+    _table = Base.metadata.tables[_table_name]
+    for _statement in _fts5_ddl(_table_name, _columns):
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    event.listen(_table, "before_drop", DDL(f"DROP TABLE IF EXISTS {_table_name}_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Type
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+from serialization import dumps, rows_response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_keyset(values: dict) -> str:
+    """Opaque cursor holding the sort key values of the last row on a page."""
+    payload = json.dumps(jsonable_encoder(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_keyset(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, dict):
+            raise ValueError
+        return values
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def encode_cursor(last_id: int) -> str:
+    return encode_keyset({"id": last_id})
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(decode_keyset(cursor)["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def projection_columns(model, schema: Type[BaseModel], fields: Optional[str]):
+    """Map a comma separated ?fields= value onto model columns; only schema fields are selectable."""
+    if not fields:
+        return None
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    # Computed fields (e.g. Class.average_percent) are not columns and cannot be projected
+    columns = model.__table__.columns
+    unknown = [field for field in requested if field not in schema.model_fields or field not in columns]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+
+    # The id is always returned because the next cursor is built from it
+    names = ["id"] + [field for field in requested if field != "id"]
+    return [getattr(model, name) for name in names]
+
+async def paginate(db, statement, model, schema: Type[BaseModel], cursor: Optional[str], limit: int,
+                   fields: Optional[str] = None) -> Response:
+    """Run a keyset-paginated query ordered by primary key.
+
+    Returns the page serialized with schema (the route's response_model), or only the
+    projected columns when ?fields= is given. The opaque cursor for the next page is
+    sent in the X-Next-Cursor header.
+    """
+    columns = projection_columns(model, schema, fields)
+    if columns:
+        statement = statement.with_only_columns(*columns)
+    if cursor:
+        statement = statement.where(model.id > decode_cursor(cursor))
+    statement = statement.order_by(model.id).limit(limit + 1)
+
+    result = await db.execute(statement)
+    rows = result.mappings().all() if columns else result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["id"] if columns else last.id)
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    if columns:
+        return Response(content=dumps([dict(row) for row in rows]), media_type="application/json", headers=headers)
+    return rows_response(schema, rows, headers)
+
+def _keyset_value(column, value):
+    if column.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return column.type.python_type(value)
+
+async def paginate_keyset(db, statement, keys, cursor: Optional[str], limit: int, descending: bool = False,
+                          mappings: bool = False):
+    """Keyset-paginate a query on several columns, the last of which must be unique (the id).
+
+    Returns the page's ORM objects (or row mappings, for a query of columns that include
+    the keys) and the cursor for the next page, or None on the last page.
+    """
+    if cursor:
+        values = decode_keyset(cursor)
+        try:
+            position = tuple(_keyset_value(column, values[column.key]) for column in keys)
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        row = tuple_(*keys)
+        statement = statement.where(row < position if descending else row > position)
+    order_by = [column.desc() if descending else column.asc() for column in keys]
+    statement = statement.order_by(*order_by).limit(limit + 1)
+
+    result = await db.execute(statement)
+    rows = result.mappings().all() if mappings else result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_keyset({
+            column.key: last[column.key] if mappings else getattr(last, column.key) for column in keys
+        })
+    return rows, next_cursor
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from config import (
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE,
+    PASSWORD_HASH_RETRY_AFTER,
+)
+
+
+def _timed_call(func, args, submitted_at):
+    # Runs inside the worker; wall-clock time so the wait is comparable across processes
+    queue_wait = max(time.time() - submitted_at, 0.0)
+    started = time.perf_counter()
+    result = func(*args)
+    return result, queue_wait, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """Bounded worker pool that keeps bcrypt work off the event loop."""
+
+    def __init__(self, kind: str = "thread", workers: int = 4, max_queue: int = 64, retry_after: int = 2):
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "failed": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="password-hash"
+                        )
+        return self._executor
+
+    def _reserve_slot(self):
+        with self._lock:
+            # Jobs beyond the worker count sit in the executor queue; shed load once it is full
+            if self._pending >= self.workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry shortly",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._pending += 1
+
+    def _record(self, queue_wait: float, hash_time: float):
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["queue_wait_seconds_total"] += queue_wait
+            self._stats["queue_wait_seconds_max"] = max(self._stats["queue_wait_seconds_max"], queue_wait)
+            self._stats["hash_seconds_total"] += hash_time
+            self._stats["hash_seconds_max"] = max(self._stats["hash_seconds_max"], hash_time)
+
+    async def run(self, func, *args):
+        self._reserve_slot()
+        try:
+            loop = asyncio.get_running_loop()
+            result, queue_wait, hash_time = await loop.run_in_executor(
+                self._get_executor(), _timed_call, func, args, time.time()
+            )
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        self._record(queue_wait, hash_time)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._pending
+            stats["workers"] = self.workers
+            stats["max_queue"] = self.max_queue
+            stats["executor"] = self.kind
+        completed = stats["completed"] or 1
+        stats["queue_wait_seconds_avg"] = stats["queue_wait_seconds_total"] / completed
+        stats["hash_seconds_avg"] = stats["hash_seconds_total"] / completed
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Global instance
+password_hasher = PasswordHasher(
+    kind=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+    retry_after=PASSWORD_HASH_RETRY_AFTER,
+)
@@ -0,0 +1,64 @@
+import json
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from models import Assignment, CalendarEvent, Class, Enrollment, LiveSession, Material, Submission, UserRole
+from routers.calendar import _events_query, _sessions_query
+from routers.search import _postgres_search
+from routers.live_sessions import _overlapping, upcoming_sessions_query
+
+now = datetime.now(timezone.utc)
+student = SimpleNamespace(id=1, role=UserRole.STUDENT)
+
+# The lookups behind the busiest routes; benchmarks/query_plans.py and tests/test_query_plans.py
+# check that each is served by an index
+HOT_QUERIES = {
+    "enrollment by student and class": select(Enrollment.id).where(
+        Enrollment.student_id == 1, Enrollment.class_id == 1
+    ),
+    "enrollments by student": select(Enrollment.class_id).where(Enrollment.student_id == 1),
+    "enrollments by class": select(Enrollment.student_id).where(Enrollment.class_id == 1),
+    "active classes by teacher": select(Class.id).where(Class.teacher_id == 1, Class.is_active == True),
+    "assignments by class": select(Assignment.id).where(Assignment.class_id == 1).order_by(Assignment.due_date),
+    "submissions by assignment": select(Submission.id).where(Submission.assignment_id == 1),
+    "submissions by student": select(Submission.id).where(Submission.student_id == 1),
+    "gradebook submissions by class": select(Submission.student_id, Submission.grade)
+    .join(Assignment, Assignment.id == Submission.assignment_id)
+    .where(Assignment.class_id == 1),
+    "calendar events by user and time": select(CalendarEvent.id).where(
+        CalendarEvent.user_id == 1,
+        CalendarEvent.start_time >= now,
+        CalendarEvent.start_time < now + timedelta(days=30),
+    ),
+    "materials by class": select(Material.id).where(Material.class_id == 1).order_by(Material.uploaded_at.desc()),
+    "live sessions by class": select(LiveSession.id).where(
+        LiveSession.class_id == 1, LiveSession.scheduled_start >= now
+    ),
+    "calendar feed events": _events_query(1, now, now + timedelta(days=30)),
+    "calendar feed live sessions": _sessions_query(student, now, now + timedelta(days=30)),
+    "upcoming sessions for a student": upcoming_sessions_query(student, now, 20),
+    "overlapping live sessions": select(LiveSession.id).where(_overlapping(now, now + timedelta(hours=1))),
+    "note search by user": _postgres_search("note", student, "revision", 20),
+    "material search": _postgres_search("material", student, "revision", 20),
+}
+
+def seq_scans(plan: dict):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+def indexes_used(plan: dict):
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from indexes_used(child)
+
+def explain(connection, statement) -> dict:
+    """The planner's top plan node for a statement; run `SET enable_seqscan = off` first."""
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = connection.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
@@ -0,0 +1,21 @@
+"""
+Counter reconciliation script
+Recomputes the materialized class, assignment and teacher counters from the underlying
+rows and repairs any that drifted (the API also does this every COUNTER_RECONCILE_INTERVAL seconds)
+Usage: python reconcile_counters.py
+"""
+import asyncio
+from database import session_scope
+from counters import reconcile_counters
+
+async def run():
+    async with session_scope() as db:
+        repaired = await reconcile_counters(db)
+    for counter, rows in repaired.items():
+        print(f"{'🔧' if rows else '✅'} {counter}: {rows} rows repaired")
+
+def main():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import calendar
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+MAX_COUNT = 1000  # Keeps series_end cheap to compute for counted series
+
+class Recurrence(NamedTuple):
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    byday: Tuple[int, ...] = ()  # Weekday numbers, Monday = 0
+
+def normalize_rule(rule: str) -> str:
+    return rule.strip().upper().removeprefix("RRULE:")
+
+def _parse_until(value: str) -> datetime:
+    try:
+        if "T" in value:
+            return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        # A date includes the whole day
+        day = datetime.strptime(value, "%Y%m%d").replace(tzinfo=timezone.utc)
+        return day + timedelta(days=1, microseconds=-1)
+    except ValueError:
+        raise ValueError(f"UNTIL must look like 20261231 or 20261231T235959Z, not {value}")
+
+def parse_rule(rule: str) -> Recurrence:
+    """Parse the RFC 5545 RRULE subset the calendar supports: FREQ=DAILY, WEEKLY or
+    MONTHLY with INTERVAL, COUNT or UNTIL, and BYDAY (plain weekdays) for weekly rules.
+    Raises ValueError describing the first problem found."""
+    parts = {}
+    for part in normalize_rule(rule).split(";"):
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if not sep or not value or key in parts:
+            raise ValueError(f"Malformed recurrence rule part: {part}")
+        parts[key] = value
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError("FREQ must be DAILY, WEEKLY or MONTHLY")
+    try:
+        interval = int(parts.pop("INTERVAL", "1"))
+        count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+    except ValueError:
+        raise ValueError("INTERVAL and COUNT must be whole numbers")
+    until = _parse_until(parts.pop("UNTIL")) if "UNTIL" in parts else None
+    byday = parts.pop("BYDAY", None)
+    if byday is not None:
+        days = byday.split(",")
+        if freq != "WEEKLY" or not set(days) <= set(WEEKDAYS):
+            raise ValueError("BYDAY is supported for WEEKLY rules as a list of MO, TU, WE, TH, FR, SA, SU")
+        byday = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+
+    if parts:
+        raise ValueError(f"Unsupported recurrence rule parts: {', '.join(sorted(parts))}")
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError("INTERVAL and COUNT must be at least 1")
+    if count is not None and count > MAX_COUNT:
+        raise ValueError(f"COUNT may be at most {MAX_COUNT}")
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot both be set")
+    return Recurrence(freq, interval, count, until, byday or ())
+
+def overlaps(start: datetime, end: datetime, window_start: datetime, window_end: datetime) -> bool:
+    # Half-open [start, end); an instant (start == end) belongs to the window it falls in
+    return start < window_end and (end > window_start or start >= window_start)
+
+def _add_months(value: datetime, months: int) -> Optional[datetime]:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    if value.day > calendar.monthrange(year, month)[1]:
+        return None  # e.g. the 31st in a 30-day month: no occurrence that month
+    return value.replace(year=year, month=month)
+
+def _occurrence_starts(start: datetime, rule: Recurrence, not_before: datetime) -> Iterator[datetime]:
+    """Occurrence starts in order, beginning at the first period that can reach not_before.
+
+    Daily and weekly rules jump straight to that period (their occurrence numbers, needed
+    for COUNT, follow arithmetically), so a long-running series costs the same to expand
+    for next week as for its first week.
+    """
+    if rule.freq == "MONTHLY":
+        # Skipped months don't count toward COUNT, so counted series are walked from the start
+        first = 0
+        if rule.count is None:
+            months = (not_before.year - start.year) * 12 + not_before.month - start.month
+            first = max(months // rule.interval - 1, 0)
+        index = 0
+        period = first
+        while True:
+            occurrence = _add_months(start, period * rule.interval)
+            period += 1
+            if occurrence is None:
+                continue
+            if (rule.count is not None and index >= rule.count) or (rule.until and occurrence > rule.until):
+                return
+            index += 1
+            yield occurrence
+
+    step = timedelta(days=rule.interval * (7 if rule.freq == "WEEKLY" else 1))
+    if rule.byday:
+        anchor = start - timedelta(days=start.weekday())  # Monday of the first week
+        offsets = [timedelta(days=day) for day in rule.byday]
+        first_week = sum(1 for offset in offsets if anchor + offset >= start)
+    else:
+        anchor, offsets, first_week = start, [timedelta(0)], 1
+
+    period = max((not_before - anchor) // step, 0)
+    index = first_week + (period - 1) * len(offsets) if period else 0
+    while True:
+        period_start = anchor + period * step
+        for offset in offsets:
+            occurrence = period_start + offset
+            if occurrence < start:
+                continue
+            if (rule.count is not None and index >= rule.count) or (rule.until and occurrence > rule.until):
+                return
+            index += 1
+            yield occurrence
+        period += 1
+
+def occurrences(start: datetime, end: datetime, rule: Recurrence,
+                window_start: datetime, window_end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+    """Yield (start, end) for each occurrence of a series overlapping [window_start, window_end)."""
+    duration = end - start
+    for occurrence_start in _occurrence_starts(start, rule, window_start - duration):
+        if occurrence_start >= window_end:
+            return
+        if overlaps(occurrence_start, occurrence_start + duration, window_start, window_end):
+            yield occurrence_start, occurrence_start + duration
+
+def series_end(start: datetime, end: datetime, rule: Optional[Recurrence]) -> Optional[datetime]:
+    """When the last occurrence ends, or None for a series that never does.
+
+    Stored alongside the event so one range check on (start_time, series_end) finds
+    every series that can have an occurrence in a window.
+    """
+    if rule is None:
+        return end
+    if rule.until is not None:
+        return rule.until + (end - start)
+    if rule.count is None:
+        return None
+    last = start
+    for last in _occurrence_starts(start, rule, start):
+        pass
+    return last + (end - start)
@@ -0,0 +1,198 @@
+import base64
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import Request, Response
+from cache import TTLCache
+from config import RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS, REDIS_URL
+from compression import choose_encoding, precompress, weak_etag
+from etags import etag_for, etag_response
+from serialization import dumps
+from models import UserRole
+
+try:
+    # redis is optional; select it with RESPONSE_CACHE_BACKEND=redis to share the cache between workers
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+# (etag, JSON body, extra headers such as the next-page cursor, the body in each compression encoding)
+Entry = Tuple[str, bytes, dict, Dict[str, bytes]]
+
+CLASS_LIST = "classes"
+
+class MemoryBackend:
+    """Entries in an in-process LRU; each worker process keeps its own."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl: float):
+        self.entries = TTLCache(max_size=max_size, ttl=ttl)
+        self.versions = {}
+
+    async def get(self, key: str) -> Optional[Entry]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, entry: Entry):
+        self.entries.set(key, entry)
+
+    async def get_versions(self, names: List[str]) -> List[int]:
+        return [self.versions.get(name, 0) for name in names]
+
+    async def bump(self, names: Iterable[str]):
+        for name in names:
+            self.versions[name] = self.versions.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        return dict(self.entries.stats(), backend=self.name, versions=len(self.versions))
+
+class RedisBackend:
+    """Entries and version counters in Redis (or a compatible server), shared by every worker.
+
+    Redis errors are treated as misses so a cache outage only costs database reads.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float, prefix: str = "lms:response:"):
+        self.client = redis.from_url(url)
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _failed(self, action: str, e: Exception):
+        self.errors += 1
+        print(f"⚠️ Response cache {action} failed: {e}")
+
+    async def get(self, key: str) -> Optional[Entry]:
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except Exception as e:
+            self._failed("read", e)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry = json.loads(raw)
+        encoded = {encoding: base64.b64decode(data) for encoding, data in entry["encoded"].items()}
+        return entry["etag"], entry["body"].encode(), entry["headers"], encoded
+
+    async def set(self, key: str, entry: Entry):
+        etag, body, headers, encoded = entry
+        raw = json.dumps({
+            "etag": etag, "body": body.decode(), "headers": headers,
+            "encoded": {encoding: base64.b64encode(data).decode() for encoding, data in encoded.items()},
+        })
+        try:
+            await self.client.set(self.prefix + key, raw, ex=self.ttl)
+        except Exception as e:
+            self._failed("write", e)
+
+    async def get_versions(self, names: List[str]) -> List[int]:
+        try:
+            values = await self.client.mget([f"{self.prefix}version:{name}" for name in names])
+        except Exception as e:
+            # A key no bump can reach would serve stale data, so look the versions up afresh next time
+            self._failed("version read", e)
+            return [None] * len(names)
+        return [int(value or 0) for value in values]
+
+    async def bump(self, names: Iterable[str]):
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for name in names:
+                    pipe.incr(f"{self.prefix}version:{name}")
+                await pipe.execute()
+        except Exception as e:
+            self._failed("invalidation", e)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+def _make_backend():
+    if RESPONSE_CACHE_BACKEND == "redis":
+        if redis is not None:
+            return RedisBackend(REDIS_URL, RESPONSE_CACHE_TTL_SECONDS)
+        print("⚠️ RESPONSE_CACHE_BACKEND=redis but the redis package is not installed; caching in memory")
+    return MemoryBackend(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS)
+
+def principal_scope(user) -> str:
+    """What a response may depend on about the caller: admins all see the same data."""
+    if user.role == UserRole.ADMIN:
+        return "admin"
+    return f"{user.role.value}:{user.id}"
+
+class ResponseCache:
+    """Serialized JSON responses keyed by route, principal scope and version counters.
+
+    Writes bump the counters of what they changed, which moves readers to new keys;
+    entries under old versions are never read again and age out of the cache.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def key(self, route: str, scope: str, versions: List[str], *params) -> Optional[str]:
+        numbers = await self.backend.get_versions(versions)
+        if None in numbers:
+            return None
+        parts = [route, scope, *(f"{name}@{number}" for name, number in zip(versions, numbers))]
+        return "|".join(parts + [str(param) for param in params])
+
+    async def respond(self, request: Request, key: Optional[str]) -> Optional[Response]:
+        """The cached response, or a 304 if the client has it already, without a database query."""
+        entry = await self.backend.get(key) if key else None
+        if entry is None:
+            return None
+        return self._send(request, entry)
+
+    async def store(self, request: Request, key: Optional[str], content=None, body: Optional[bytes] = None,
+                    headers: Optional[dict] = None) -> Response:
+        """Cache the response for content (or an already serialized body) and send it."""
+        if body is None:
+            body = dumps(content)
+        entry = (etag_for(body), body, dict(headers or {}), {})
+        if key:
+            # Compressed once here rather than by the middleware on every hit
+            entry = entry[:3] + (precompress(body),)
+            await self.backend.set(key, entry)
+        return self._send(request, entry)
+
+    def _send(self, request: Request, entry: Entry) -> Response:
+        etag, body, headers, encoded = entry
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), encoded)
+        if encoded:
+            headers = dict(headers, Vary="Accept-Encoding")
+        if encoding:
+            # Already encoded, so the compression middleware passes it through
+            body, etag = encoded[encoding], weak_etag(etag)
+            headers["Content-Encoding"] = encoding
+        return etag_response(request, body, etag, headers)
+
+    async def invalidate(self, *names: str):
+        await self.backend.bump(names)
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+response_cache = ResponseCache(_make_backend())
+
+def class_version(class_id: int) -> str:
+    return f"class:{class_id}"
+
+async def invalidate_class(class_id: int):
+    """Call after committing any change to a class, its enrollments or its counters."""
+    await response_cache.invalidate(class_version(class_id), CLASS_LIST)
+
+async def invalidate_classes(class_ids: Iterable[int]):
+    # invalidate_class for many classes, e.g. every class whose counters were repaired
+    await response_cache.invalidate(*(class_version(class_id) for class_id in class_ids), CLASS_LIST)
@@ -1 +1 @@
-from . import auth, users, classes
+from . import auth, users, classes, exports, files, materials, assignments, dashboard, calendar, search, live_sessions
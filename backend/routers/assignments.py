@@ -0,0 +1,390 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_db
+from models import Assignment, Class, Enrollment, Submission, User, UserRole
+from schemas import (
+    Assignment as AssignmentSchema, AssignmentCreate, AssignmentUpdate,
+    Submission as SubmissionSchema, SubmissionUpdate, Gradebook
+)
+from auth import get_current_active_user, require_roles
+from access import visible_class_ids, get_managed_class
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from pagination import NEXT_CURSOR_HEADER, paginate_keyset
+from uploads import store_upload, discard_upload, release_upload
+from counters import bump
+from response_cache import invalidate_class
+
+router = APIRouter(prefix="/assignments", tags=["assignments"])
+
+async def _get_visible_assignment(db: AsyncSession, assignment_id: int, current_user: User) -> Assignment:
+    result = await db.execute(select(Assignment).where(
+        Assignment.id == assignment_id,
+        Assignment.class_id.in_(visible_class_ids(current_user))
+    ))
+    assignment = result.scalars().first()
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found"
+        )
+    return assignment
+
+async def build_gradebook(db: AsyncSession, class_id: int) -> dict:
+    """Grade matrix for a class from three set-based queries, however many cells it has."""
+    result = await db.execute(
+        select(Assignment.id, Assignment.title, Assignment.due_date, Assignment.max_points)
+        .where(Assignment.class_id == class_id)
+        .order_by(Assignment.due_date, Assignment.id)
+    )
+    assignments = result.all()
+    
+    result = await db.execute(
+        select(User.id, User.full_name, User.email)
+        .join(Enrollment, Enrollment.student_id == User.id)
+        .where(Enrollment.class_id == class_id)
+        .order_by(User.full_name, User.id)
+    )
+    students = result.all()
+    
+    # Every submission in the class; later submissions win if a student has several
+    result = await db.execute(
+        select(Submission.student_id, Submission.assignment_id, Submission.grade)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .where(Assignment.class_id == class_id)
+        .order_by(Submission.submitted_at, Submission.id)
+    )
+    column = {assignment.id: index for index, assignment in enumerate(assignments)}
+    row = {student.id: index for index, student in enumerate(students)}
+    grades = [[None] * len(assignments) for _ in students]
+    submitted = [[False] * len(assignments) for _ in students]
+    for student_id, assignment_id, grade in result.tuples():
+        i = row.get(student_id)
+        if i is None:
+            continue  # No longer enrolled
+        j = column[assignment_id]
+        grades[i][j] = grade
+        submitted[i][j] = True
+    
+    now = datetime.now(timezone.utc)
+    past_due = [_as_aware(assignment.due_date) < now for assignment in assignments]
+    max_points = [assignment.max_points or 0 for assignment in assignments]
+    
+    student_rows = []
+    class_earned = class_possible = 0
+    for student, student_grades, student_submitted in zip(students, grades, submitted):
+        earned = sum(grade for grade in student_grades if grade is not None)
+        possible = sum(points for grade, points in zip(student_grades, max_points) if grade is not None)
+        class_earned += earned
+        class_possible += possible
+        student_rows.append({
+            "id": student.id,
+            "full_name": student.full_name,
+            "email": student.email,
+            "grades": student_grades,
+            "submitted": student_submitted,
+            "missing": sum(1 for done, due in zip(student_submitted, past_due) if due and not done),
+            "average_percent": round(100 * earned / possible, 2) if possible else None,
+        })
+    
+    # Columns are read by transposing the matrix once rather than indexing cell by cell
+    assignment_rows = []
+    columns = zip(zip(*grades), zip(*submitted)) if students else (((), ()) for _ in assignments)
+    for assignment, due, (column_grades, column_submitted) in zip(assignments, past_due, columns):
+        graded = [grade for grade in column_grades if grade is not None]
+        submitted_count = sum(column_submitted)
+        assignment_rows.append({
+            "id": assignment.id,
+            "title": assignment.title,
+            "due_date": assignment.due_date,
+            "max_points": assignment.max_points,
+            "submitted": submitted_count,
+            "graded": len(graded),
+            "missing": len(students) - submitted_count if due else 0,
+            "average_grade": round(sum(graded) / len(graded), 2) if graded else None,
+        })
+    
+    return {
+        "class_id": class_id,
+        "assignments": assignment_rows,
+        "students": student_rows,
+        "average_percent": round(100 * class_earned / class_possible, 2) if class_possible else None,
+    }
+
+async def _count_grade_change(db: AsyncSession, assignment: Assignment, old_grade, new_grade):
+    # Keeps the assignment's graded count and the class's points totals in step with a grade
+    graded = (new_grade is not None) - (old_grade is not None)
+    await bump(db, Assignment, assignment.id, graded_count=graded)
+    await bump(
+        db, Class, assignment.class_id,
+        points_earned=(new_grade or 0) - (old_grade or 0),
+        points_possible=graded * (assignment.max_points or 0),
+    )
+
+def _as_aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; PostgreSQL timestamptz values are already aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+@router.get("/gradebook/{class_id}", response_model=Gradebook)
+async def get_gradebook(
+    class_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    await get_managed_class(db, class_id, current_user, "view the gradebook of")
+    return await build_gradebook(db, class_id)
+
+@router.post("/", response_model=AssignmentSchema)
+async def create_assignment(
+    assignment_data: AssignmentCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    class_obj = await get_managed_class(db, assignment_data.class_id, current_user, "add assignments to")
+    
+    db_assignment = Assignment(
+        title=assignment_data.title,
+        description=assignment_data.description,
+        due_date=assignment_data.due_date,
+        max_points=assignment_data.max_points,
+        class_id=assignment_data.class_id,
+        teacher_id=class_obj.teacher_id
+    )
+    
+    db.add(db_assignment)
+    await db.commit()
+    await db.refresh(db_assignment)
+    
+    return db_assignment
+
+@router.get("/", response_model=List[AssignmentSchema])
+async def get_assignments(
+    response: Response,
+    class_id: Optional[List[int]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Ordered by due date across the requested (or all visible) classes
+    query = select(Assignment).where(Assignment.class_id.in_(visible_class_ids(current_user)))
+    if class_id:
+        query = query.where(Assignment.class_id.in_(class_id))
+    assignments, next_cursor = await paginate_keyset(
+        db, query, [Assignment.due_date, Assignment.id], cursor, limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return assignments
+
+@router.get("/{assignment_id}", response_model=AssignmentSchema)
+async def get_assignment(
+    assignment_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return await _get_visible_assignment(db, assignment_id, current_user)
+
+@router.put("/{assignment_id}", response_model=AssignmentSchema)
+async def update_assignment(
+    assignment_id: int,
+    assignment_update: AssignmentUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    assignment = await db.get(Assignment, assignment_id)
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found"
+        )
+    
+    await get_managed_class(db, assignment.class_id, current_user, "update assignments in")
+    
+    old_max_points = assignment.max_points or 0
+    update_data = assignment_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(assignment, field, value)
+    
+    # Graded submissions are now worth a different number of points
+    points_change = ((assignment.max_points or 0) - old_max_points) * assignment.graded_count
+    await bump(db, Class, assignment.class_id, points_possible=points_change)
+    await db.commit()
+    if points_change:
+        await invalidate_class(assignment.class_id)
+    await db.refresh(assignment)
+    
+    return assignment
+
+@router.delete("/{assignment_id}")
+async def delete_assignment(
+    assignment_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    assignment = await db.get(Assignment, assignment_id)
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found"
+        )
+    
+    await get_managed_class(db, assignment.class_id, current_user, "delete assignments from")
+    
+    # Submissions go with the assignment, releasing any files they hold
+    result = await db.execute(
+        select(Submission.content_hash)
+        .where(Submission.assignment_id == assignment_id, Submission.content_hash.isnot(None))
+    )
+    content_hashes = result.scalars().all()
+    result = await db.execute(
+        select(func.count(Submission.grade), func.coalesce(func.sum(Submission.grade), 0))
+        .where(Submission.assignment_id == assignment_id)
+    )
+    graded, earned = result.one()
+    await bump(
+        db, Class, assignment.class_id,
+        points_earned=-earned,
+        points_possible=-graded * (assignment.max_points or 0),
+    )
+    await db.execute(delete(Submission).where(Submission.assignment_id == assignment_id))
+    await db.delete(assignment)
+    await db.commit()
+    await invalidate_class(assignment.class_id)
+    for content_hash in content_hashes:
+        await release_upload(db, content_hash)
+    
+    return {"message": "Assignment deleted successfully"}
+
+@router.post("/{assignment_id}/submissions", response_model=SubmissionSchema)
+async def submit_assignment(
+    assignment_id: int,
+    text_content: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["student"]))
+):
+    assignment = await _get_visible_assignment(db, assignment_id, current_user)
+    if text_content is None and file is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A submission needs text content or a file"
+        )
+    
+    stored = None
+    if file is not None:
+        # End the lookup's transaction so the connection isn't left idle in it while the file streams in
+        await db.commit()
+        stored = await store_upload(db, file)
+    values = {
+        "text_content": text_content,
+        "submitted_at": datetime.now(timezone.utc),
+        "grade": None,
+        "feedback": None,
+    }
+    if stored is not None:
+        values.update(file_url=stored["url"], content_hash=stored["content_hash"])
+    
+    previous_hash = None
+    ungraded = False
+    try:
+        # ON CONFLICT covers a submission created concurrently; only a new row is counted
+        result = await db.execute(
+            pg_insert(Submission)
+            .values(assignment_id=assignment_id, student_id=current_user.id, **values)
+            .on_conflict_do_nothing(index_elements=[Submission.assignment_id, Submission.student_id])
+            .returning(Submission.id)
+        )
+        submission_id = result.scalar()
+        if submission_id is not None:
+            await bump(db, Assignment, assignment_id, submission_count=1)
+        else:
+            # Resubmitting replaces the student's previous submission and clears its grade
+            result = await db.execute(
+                select(Submission.id, Submission.grade, Submission.content_hash)
+                .where(Submission.assignment_id == assignment_id, Submission.student_id == current_user.id)
+                .with_for_update()
+            )
+            submission_id, grade, content_hash = result.one()
+            ungraded = grade is not None
+            if ungraded:
+                await _count_grade_change(db, assignment, grade, None)
+            if stored is not None:
+                previous_hash = content_hash
+            await db.execute(update(Submission).where(Submission.id == submission_id).values(values))
+        await db.commit()
+    except Exception:
+        if stored is not None:
+            await discard_upload(db, stored)
+        raise
+    if ungraded:
+        # The class average no longer counts the old grade
+        await invalidate_class(assignment.class_id)
+    submission = await db.get(Submission, submission_id)
+    if previous_hash is not None:
+        await release_upload(db, previous_hash)
+    
+    return submission
+
+@router.get("/{assignment_id}/submissions", response_model=List[SubmissionSchema])
+async def get_submissions(
+    assignment_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    assignment = await _get_visible_assignment(db, assignment_id, current_user)
+    
+    # Students only ever see their own submission
+    query = select(Submission).where(Submission.assignment_id == assignment.id)
+    if current_user.role == UserRole.STUDENT:
+        query = query.where(Submission.student_id == current_user.id)
+    submissions, next_cursor = await paginate_keyset(db, query, [Submission.id], cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return submissions
+
+@router.put("/{assignment_id}/submissions/{submission_id}", response_model=SubmissionSchema)
+async def grade_submission(
+    assignment_id: int,
+    submission_id: int,
+    submission_update: SubmissionUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    # Locked, like a resubmission's, so the grade counters move from the grade being replaced
+    submission = await db.get(Submission, submission_id, with_for_update=True)
+    assignment = await db.get(Assignment, assignment_id)
+    if not submission or not assignment or submission.assignment_id != assignment_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Submission not found"
+        )
+    
+    await get_managed_class(db, assignment.class_id, current_user, "grade submissions in")
+    
+    update_data = submission_update.dict(exclude_unset=True, exclude={"text_content"})
+    grade = update_data.get("grade")
+    if grade is not None and not 0 <= grade <= (assignment.max_points or 0):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Grade must be between 0 and {assignment.max_points}"
+        )
+    if "grade" in update_data:
+        await _count_grade_change(db, assignment, submission.grade, update_data["grade"])
+    for field, value in update_data.items():
+        setattr(submission, field, value)
+    
+    await db.commit()
+    if "grade" in update_data:
+        await invalidate_class(assignment.class_id)
+    await db.refresh(submission)
+    
+    return submission
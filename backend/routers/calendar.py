@@ -0,0 +1,331 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_db, session_scope, stream_partitions
+from models import Assignment, CalendarEvent, LiveSession, User
+from schemas import (
+    CalendarEvent as CalendarEventSchema, CalendarEventCreate, CalendarEventUpdate, CalendarFeedItem
+)
+from auth import get_current_active_user
+from access import visible_class_ids
+from config import CALENDAR_MAX_WINDOW_DAYS, EXPORT_BATCH_SIZE
+from recurrence import normalize_rule, occurrences, overlaps, parse_rule, series_end
+
+router = APIRouter(prefix="/calendar", tags=["calendar"])
+
+ICS_PRODID = "-//Reactor Minds//Nexus Learning//EN"
+ICS_DEFAULT_PAST_DAYS = 30
+
+def _as_aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; PostgreSQL timestamptz values are already aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _period(start, end, bounds: str):
+    # Bounds are inlined so the expression matches the GiST indexes in models.py
+    return func.tstzrange(start, end, literal_column(f"'{bounds}'"))
+
+def _overlapping(period, window_start: datetime, window_end: datetime):
+    return period.op("&&")(_period(window_start, window_end, "[)"))
+
+def _check_window(window_start: datetime, window_end: datetime):
+    window_start, window_end = _as_aware(window_start), _as_aware(window_end)
+    if window_end <= window_start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must be later than 'from'"
+        )
+    if window_end - window_start > timedelta(days=CALENDAR_MAX_WINDOW_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The calendar window may cover at most {CALENDAR_MAX_WINDOW_DAYS} days"
+        )
+    return window_start, window_end
+
+def _events_query(user_id: int, window_start: datetime, window_end: datetime):
+    period = _period(CalendarEvent.start_time, CalendarEvent.series_end, "[]")
+    return (
+        select(
+            CalendarEvent.id, CalendarEvent.title, CalendarEvent.description, CalendarEvent.start_time,
+            CalendarEvent.end_time, CalendarEvent.event_type, CalendarEvent.reference_id,
+            CalendarEvent.recurrence_rule,
+        )
+        .where(CalendarEvent.user_id == user_id, _overlapping(period, window_start, window_end))
+        .order_by(CalendarEvent.id)
+    )
+
+def _assignments_query(current_user, window_start: datetime, window_end: datetime):
+    return (
+        select(Assignment.id, Assignment.title, Assignment.description, Assignment.due_date, Assignment.class_id)
+        .where(
+            Assignment.class_id.in_(visible_class_ids(current_user)),
+            Assignment.due_date >= window_start,
+            Assignment.due_date < window_end,
+        )
+        .order_by(Assignment.id)
+    )
+
+def _sessions_query(current_user, window_start: datetime, window_end: datetime):
+    period = _period(LiveSession.scheduled_start, LiveSession.scheduled_end, "[)")
+    return (
+        select(
+            LiveSession.id, LiveSession.title, LiveSession.description, LiveSession.scheduled_start,
+            LiveSession.scheduled_end, LiveSession.class_id, LiveSession.meeting_url,
+        )
+        .where(
+            LiveSession.class_id.in_(visible_class_ids(current_user)),
+            _overlapping(period, window_start, window_end),
+        )
+        .order_by(LiveSession.id)
+    )
+
+async def build_feed(db: AsyncSession, current_user, window_start: datetime, window_end: datetime) -> List[dict]:
+    """Everything on a user's calendar in [window_start, window_end): their own events,
+    with recurring ones expanded inside the window only, plus the due dates and live
+    sessions of the classes they can see. Three indexed range queries in all."""
+    items = []
+    result = await db.execute(_assignments_query(current_user, window_start, window_end))
+    for row in result.all():
+        due = _as_aware(row.due_date)
+        items.append({
+            "kind": "assignment", "id": row.id, "title": row.title, "description": row.description,
+            "start_time": due, "end_time": due, "class_id": row.class_id,
+        })
+
+    result = await db.execute(_sessions_query(current_user, window_start, window_end))
+    for row in result.all():
+        items.append({
+            "kind": "live_session", "id": row.id, "title": row.title, "description": row.description,
+            "start_time": _as_aware(row.scheduled_start), "end_time": _as_aware(row.scheduled_end),
+            "class_id": row.class_id,
+        })
+
+    # Personal entries that only point at an assignment or session already listed are dropped
+    listed = {(item["kind"], item["id"]) for item in items}
+    result = await db.execute(_events_query(current_user.id, window_start, window_end))
+    for row in result.all():
+        if (row.event_type, row.reference_id) in listed:
+            continue
+        start, end = _as_aware(row.start_time), _as_aware(row.end_time)
+        if row.recurrence_rule:
+            spans = occurrences(start, end, parse_rule(row.recurrence_rule), window_start, window_end)
+        else:
+            spans = [(start, end)] if overlaps(start, end, window_start, window_end) else []
+        for occurrence_start, occurrence_end in spans:
+            items.append({
+                "kind": "event", "id": row.id, "title": row.title, "description": row.description,
+                "start_time": occurrence_start, "end_time": occurrence_end,
+                "recurring": bool(row.recurrence_rule),
+            })
+
+    items.sort(key=lambda item: (item["start_time"], item["kind"], item["id"]))
+    return items
+
+def _ics_text(value: Optional[str]) -> str:
+    return (
+        (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "")
+    )
+
+def _ics_time(value: datetime) -> str:
+    return _as_aware(value).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def _ics_line(line: str) -> str:
+    # Fold to 75 octets per line without splitting a UTF-8 character (RFC 5545 section 3.1)
+    if len(line.encode()) <= 75:
+        return line + "\r\n"
+    parts, current, size = [], "", 0
+    for char in line:
+        char_size = len(char.encode())
+        if size + char_size > 75:
+            parts.append(current)
+            current, size = "", 1  # Continuation lines start with a space
+        current += char
+        size += char_size
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+def _vevent(uid: str, stamp: str, title: str, description: Optional[str], start: datetime,
+            end: Optional[datetime] = None, rule: Optional[str] = None, url: Optional[str] = None) -> str:
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{stamp}", f"DTSTART:{_ics_time(start)}"]
+    if end is not None:
+        lines.append(f"DTEND:{_ics_time(end)}")
+    if rule:
+        lines.append(f"RRULE:{rule}")
+    lines.append(f"SUMMARY:{_ics_text(title)}")
+    if description:
+        lines.append(f"DESCRIPTION:{_ics_text(description)}")
+    if url:
+        lines.append(f"URL:{url}")
+    lines.append("END:VEVENT")
+    return "".join(_ics_line(line) for line in lines)
+
+async def ics_chunks(current_user, window_start: datetime, window_end: datetime):
+    """Encode the calendar as iCalendar one partition of rows at a time.
+
+    Recurring events are written once with their RRULE for the client to expand.
+    """
+    stamp = _ics_time(datetime.now(timezone.utc))
+    yield "".join(_ics_line(line) for line in [
+        "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{ICS_PRODID}", "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+    ]).encode()
+    # As in the JSON feed, personal entries pointing at a listed assignment or session are skipped
+    listed = set()
+    async with session_scope() as db:
+        statement = _assignments_query(current_user, window_start, window_end)
+        async for rows in stream_partitions(db, statement, EXPORT_BATCH_SIZE):
+            listed.update(("assignment", row["id"]) for row in rows)
+            yield "".join(
+                _vevent(f"assignment-{row['id']}@nexus-learning", stamp, row["title"], row["description"],
+                        row["due_date"])
+                for row in rows
+            ).encode()
+
+        statement = _sessions_query(current_user, window_start, window_end)
+        async for rows in stream_partitions(db, statement, EXPORT_BATCH_SIZE):
+            listed.update(("live_session", row["id"]) for row in rows)
+            yield "".join(
+                _vevent(f"live-session-{row['id']}@nexus-learning", stamp, row["title"], row["description"],
+                        row["scheduled_start"], row["scheduled_end"], url=row["meeting_url"])
+                for row in rows
+            ).encode()
+
+        statement = _events_query(current_user.id, window_start, window_end)
+        async for rows in stream_partitions(db, statement, EXPORT_BATCH_SIZE):
+            yield "".join(
+                _vevent(f"event-{row['id']}@nexus-learning", stamp, row["title"], row["description"],
+                        row["start_time"], row["end_time"], rule=row["recurrence_rule"])
+                for row in rows if (row["event_type"], row["reference_id"]) not in listed
+            ).encode()
+    yield _ics_line("END:VCALENDAR").encode()
+
+@router.get("/feed", response_model=List[CalendarFeedItem])
+async def get_calendar_feed(
+    window_start: datetime = Query(..., alias="from"),
+    window_end: datetime = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    window_start, window_end = _check_window(window_start, window_end)
+    return await build_feed(db, current_user, window_start, window_end)
+
+@router.get("/feed.ics")
+async def export_calendar(
+    window_start: Optional[datetime] = Query(None, alias="from"),
+    window_end: Optional[datetime] = Query(None, alias="to"),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Without a window, export from a month ago as far ahead as one window allows
+    if window_start is None:
+        window_start = datetime.now(timezone.utc) - timedelta(days=ICS_DEFAULT_PAST_DAYS)
+    if window_end is None:
+        window_end = _as_aware(window_start) + timedelta(days=CALENDAR_MAX_WINDOW_DAYS)
+    window_start, window_end = _check_window(window_start, window_end)
+    
+    return StreamingResponse(
+        ics_chunks(current_user, window_start, window_end),
+        media_type="text/calendar",
+        headers={"Content-Disposition": 'attachment; filename="calendar.ics"'},
+    )
+
+def _apply_recurrence(event: CalendarEvent):
+    """Validate the event's times and rule and store where its series ends."""
+    if _as_aware(event.end_time) < _as_aware(event.start_time):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_time cannot be before start_time"
+        )
+    rule = None
+    if event.recurrence_rule:
+        try:
+            rule = parse_rule(event.recurrence_rule)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid recurrence rule: {e}"
+            )
+        if rule.until is not None and rule.until < _as_aware(event.start_time):
+            # The series would end before it starts
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid recurrence rule: UNTIL cannot be before start_time"
+            )
+        event.recurrence_rule = normalize_rule(event.recurrence_rule)
+    else:
+        event.recurrence_rule = None
+    event.series_end = series_end(_as_aware(event.start_time), _as_aware(event.end_time), rule)
+
+async def _get_own_event(db: AsyncSession, event_id: int, current_user: User) -> CalendarEvent:
+    event = await db.get(CalendarEvent, event_id)
+    if not event or event.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Calendar event not found"
+        )
+    return event
+
+@router.post("/events", response_model=CalendarEventSchema)
+async def create_event(
+    event: CalendarEventCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    db_event = CalendarEvent(**event.dict(), user_id=current_user.id)
+    _apply_recurrence(db_event)
+    db.add(db_event)
+    await db.commit()
+    await db.refresh(db_event)
+    
+    return db_event
+
+@router.get("/events/{event_id}", response_model=CalendarEventSchema)
+async def get_event(
+    event_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    return await _get_own_event(db, event_id, current_user)
+
+@router.put("/events/{event_id}", response_model=CalendarEventSchema)
+async def update_event(
+    event_id: int,
+    event_update: CalendarEventUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    event = await _get_own_event(db, event_id, current_user)
+    
+    update_data = event_update.dict(exclude_unset=True)
+    # Optional in the update schema only so they can be left out, not cleared
+    cleared = [
+        field for field in ("title", "start_time", "end_time", "event_type")
+        if field in update_data and update_data[field] is None
+    ]
+    if cleared:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{', '.join(cleared)} cannot be null"
+        )
+    for field, value in update_data.items():
+        setattr(event, field, value)
+    _apply_recurrence(event)
+    
+    await db.commit()
+    await db.refresh(event)
+    
+    return event
+
+@router.delete("/events/{event_id}")
+async def delete_event(
+    event_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    event = await _get_own_event(db, event_id, current_user)
+    await db.delete(event)
+    await db.commit()
+    
+    return {"message": "Calendar event deleted successfully"}
+    
\ No newline at end of file
@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import csv
+import io
+from collections import Counter
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 from database import get_db
 from models import Class, User, UserRole, Enrollment
-from schemas import Class as ClassSchema, ClassCreate, ClassUpdate, EnrollmentCreate, Enrollment as EnrollmentSchema
+from schemas import (
+    Class as ClassSchema, ClassCreate, ClassUpdate, ClassStudent, EnrollmentCreate, Enrollment as EnrollmentSchema,
+    BulkEnrollmentCreate, BulkEnrollmentResult
+)
 from auth import get_current_active_user, require_roles
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, BULK_ENROLL_MAX
+from pagination import NEXT_CURSOR_HEADER, paginate, paginate_keyset
+from counters import bump
+from serialization import dump_row, rows_response
+from response_cache import CLASS_LIST, class_version, invalidate_class, principal_scope, response_cache
 
 router = APIRouter(prefix="/classes", tags=["classes"])
 
 @router.post("/", response_model=ClassSchema)
-def create_class(
+async def create_class(
     class_data: ClassCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(["admin", "teacher"]))
 ):
     # Only teachers can create classes for themselves, admins can create for any teacher
@@ -28,43 +41,66 @@ def create_class(
     )
     
     db.add(db_class)
-    db.commit()
-    db.refresh(db_class)
+    await bump(db, User, teacher_id, class_count=1)
+    await db.commit()
+    await db.refresh(db_class)
+    await invalidate_class(db_class.id)
     
     return db_class
 
 @router.get("/", response_model=List[ClassSchema])
-def get_classes(
-    db: Session = Depends(get_db),
+async def get_classes(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    # Any class change moves the list to a new key, so a cached page is never stale
+    key = await response_cache.key(
+        "classes", principal_scope(current_user), [CLASS_LIST], cursor, limit, fields
+    )
+    cached = await response_cache.respond(request, key)
+    if cached is not None:
+        return cached
+    
     if current_user.role == UserRole.ADMIN:
         # Admin sees all classes
-        classes = db.query(Class).filter(Class.is_active == True).all()
+        query = select(Class).where(Class.is_active == True)
     elif current_user.role == UserRole.TEACHER:
         # Teacher sees their own classes
-        classes = db.query(Class).filter(
+        query = select(Class).where(
             Class.teacher_id == current_user.id,
             Class.is_active == True
-        ).all()
+        )
     else:
         # Student sees enrolled classes
-        enrollments = db.query(Enrollment).filter(Enrollment.student_id == current_user.id).all()
-        class_ids = [enrollment.class_id for enrollment in enrollments]
-        classes = db.query(Class).filter(
-            Class.id.in_(class_ids),
+        enrolled_class_ids = select(Enrollment.class_id).where(Enrollment.student_id == current_user.id)
+        query = select(Class).where(
+            Class.id.in_(enrolled_class_ids),
             Class.is_active == True
-        ).all()
+        )
     
-    return classes
+    page = await paginate(db, query, Class, ClassSchema, cursor, limit, fields)
+    next_cursor = page.headers.get(NEXT_CURSOR_HEADER)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return await response_cache.store(request, key, body=page.body, headers=headers)
 
 @router.get("/{class_id}", response_model=ClassSchema)
-def get_class(
+async def get_class(
     class_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    # Cached per principal, so only callers who passed the checks below get a hit
+    key = await response_cache.key("class", principal_scope(current_user), [class_version(class_id)])
+    cached = await response_cache.respond(request, key)
+    if cached is not None:
+        return cached
+    
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,10 +110,11 @@ def get_class(
     # Check permissions
     if current_user.role == UserRole.STUDENT:
         # Check if student is enrolled
-        enrollment = db.query(Enrollment).filter(
+        result = await db.execute(select(Enrollment).where(
             Enrollment.student_id == current_user.id,
             Enrollment.class_id == class_id
-        ).first()
+        ))
+        enrollment = result.scalars().first()
         if not enrollment:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -90,16 +127,16 @@ def get_class(
             detail="Not authorized to view this class"
         )
     
-    return class_obj
+    return await response_cache.store(request, key, body=dump_row(ClassSchema, class_obj))
 
 @router.put("/{class_id}", response_model=ClassSchema)
-def update_class(
+async def update_class(
     class_id: int,
     class_update: ClassUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -114,22 +151,26 @@ def update_class(
         )
     
     # Update class fields
+    was_active = bool(class_obj.is_active)
     update_data = class_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(class_obj, field, value)
     
-    db.commit()
-    db.refresh(class_obj)
+    if bool(class_obj.is_active) != was_active:
+        await bump(db, User, class_obj.teacher_id, class_count=1 if class_obj.is_active else -1)
+    await db.commit()
+    await invalidate_class(class_id)
+    await db.refresh(class_obj)
     
     return class_obj
 
 @router.delete("/{class_id}")
-def delete_class(
+async def delete_class(
     class_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(["admin", "teacher"]))
 ):
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -144,20 +185,23 @@ def delete_class(
         )
     
     # Soft delete
+    if class_obj.is_active:
+        await bump(db, User, class_obj.teacher_id, class_count=-1)
     class_obj.is_active = False
-    db.commit()
+    await db.commit()
+    await invalidate_class(class_id)
     
     return {"message": "Class deleted successfully"}
 
 @router.post("/{class_id}/enroll", response_model=EnrollmentSchema)
-def enroll_student(
+async def enroll_student(
     class_id: int,
     enrollment_data: EnrollmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(["admin", "teacher"]))
 ):
     # Check if class exists
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -165,10 +209,11 @@ def enroll_student(
         )
     
     # Check if student exists
-    student = db.query(User).filter(
+    result = await db.execute(select(User).where(
         User.id == enrollment_data.student_id,
         User.role == UserRole.STUDENT
-    ).first()
+    ))
+    student = result.scalars().first()
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -176,10 +221,11 @@ def enroll_student(
         )
     
     # Check if already enrolled
-    existing_enrollment = db.query(Enrollment).filter(
+    result = await db.execute(select(Enrollment).where(
         Enrollment.student_id == enrollment_data.student_id,
         Enrollment.class_id == class_id
-    ).first()
+    ))
+    existing_enrollment = result.scalars().first()
     if existing_enrollment:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -193,19 +239,143 @@ def enroll_student(
     )
     
     db.add(db_enrollment)
-    db.commit()
-    db.refresh(db_enrollment)
+    await bump(db, Class, class_id, student_count=1)
+    await db.commit()
+    await invalidate_class(class_id)
+    await db.refresh(db_enrollment)
     
     return db_enrollment
 
-@router.get("/{class_id}/students", response_model=List[dict])
-def get_class_students(
+async def _bulk_enroll(db: AsyncSession, class_id: int, student_ids: List[int], current_user: User):
+    if len(student_ids) > BULK_ENROLL_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_ENROLL_MAX} students can be enrolled per request"
+        )
+    
+    class_obj = await db.get(Class, class_id)
+    if not class_obj:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Class not found"
+        )
+    
+    if current_user.role != UserRole.ADMIN and class_obj.teacher_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to enroll students in this class"
+        )
+    
+    unique_ids = list(dict.fromkeys(student_ids))
+    
+    # One set-based lookup: which ids are students, and which of those are already enrolled
+    result = await db.execute(
+        select(User.id, Enrollment.id.label("enrollment_id"))
+        .outerjoin(Enrollment, and_(Enrollment.student_id == User.id, Enrollment.class_id == class_id))
+        .where(User.id.in_(unique_ids), User.role == UserRole.STUDENT)
+    )
+    enrolled = {}
+    for student_id, enrollment_id in result.all():
+        enrolled[student_id] = enrollment_id is not None
+    
+    to_insert = [student_id for student_id in unique_ids if enrolled.get(student_id) is False]
+    inserted = set()
+    if to_insert:
+        # ON CONFLICT covers enrollments created concurrently since the lookup above
+        result = await db.execute(
+            pg_insert(Enrollment)
+            .values([{"student_id": student_id, "class_id": class_id} for student_id in to_insert])
+            .on_conflict_do_nothing()
+            .returning(Enrollment.student_id)
+        )
+        inserted = set(result.scalars().all())
+        await bump(db, Class, class_id, student_count=len(inserted))
+    await db.commit()
+    if inserted:
+        await invalidate_class(class_id)
+    
+    results = []
+    seen = set()
+    for student_id in student_ids:
+        if student_id in seen:
+            row_status = "duplicate"
+        elif student_id not in enrolled:
+            row_status = "not_found"
+        elif student_id in inserted:
+            row_status = "enrolled"
+        else:
+            row_status = "already_enrolled"
+        seen.add(student_id)
+        results.append({"student_id": student_id, "status": row_status})
+    
+    counts = Counter(row["status"] for row in results)
+    return {
+        "class_id": class_id,
+        "enrolled": counts["enrolled"],
+        "already_enrolled": counts["already_enrolled"],
+        "not_found": counts["not_found"],
+        "duplicate": counts["duplicate"],
+        "results": results,
+    }
+
+@router.post("/{class_id}/enroll/bulk", response_model=BulkEnrollmentResult)
+async def bulk_enroll_students(
+    class_id: int,
+    enrollment_data: BulkEnrollmentCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    return await _bulk_enroll(db, class_id, enrollment_data.student_ids, current_user)
+
+@router.post("/{class_id}/enroll/bulk/csv", response_model=BulkEnrollmentResult)
+async def bulk_enroll_students_csv(
+    class_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    # Accepts one student id per row, in the first column or a "student_id" column
+    try:
+        rows = list(csv.reader(io.StringIO((await file.read()).decode("utf-8-sig"))))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse CSV file: {e}"
+        )
+    column = 0
+    first_row = 1
+    if rows and rows[0] and not rows[0][0].strip().isdigit():
+        header = [name.strip().lower() for name in rows[0]]
+        column = header.index("student_id") if "student_id" in header else 0
+        rows = rows[1:]
+        first_row = 2  # Row numbers count the header, as a spreadsheet shows them
+    
+    student_ids = []
+    for line_number, row in enumerate(rows, start=first_row):
+        if len(row) <= column or not row[column].strip():
+            continue
+        try:
+            student_ids.append(int(row[column]))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid student id on row {line_number}: {row[column]!r}"
+            )
+    
+    return await _bulk_enroll(db, class_id, student_ids, current_user)
+
+@router.get("/{class_id}/students", response_model=List[ClassStudent])
+async def get_class_students(
     class_id: int,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    sort: Literal["name", "enrolled_at"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(["admin", "teacher"]))
 ):
     # Check if class exists and user has permission
-    class_obj = db.query(Class).filter(Class.id == class_id).first()
+    class_obj = await db.get(Class, class_id)
     if not class_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -218,18 +388,17 @@ def get_class_students(
             detail="Not authorized to view this class's students"
         )
     
-    # Get enrolled students
-    enrollments = db.query(Enrollment).filter(Enrollment.class_id == class_id).all()
-    students = []
-    
-    for enrollment in enrollments:
-        student = db.query(User).filter(User.id == enrollment.student_id).first()
-        if student:
-            students.append({
-                "id": student.id,
-                "email": student.email,
-                "full_name": student.full_name,
-                "enrolled_at": enrollment.enrolled_at
-            })
+    # Get enrolled students in one joined query, projecting only the returned columns;
+    # the cursor for the next page is sent in the X-Next-Cursor header
+    sort_column = User.full_name if sort == "name" else Enrollment.enrolled_at
+    query = (
+        select(User.id, User.email, User.full_name, Enrollment.enrolled_at)
+        .join(Enrollment, Enrollment.student_id == User.id)
+        .where(Enrollment.class_id == class_id)
+    )
+    students, next_cursor = await paginate_keyset(
+        db, query, [sort_column, User.id], cursor, limit, descending=order == "desc", mappings=True
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
     
-    return students
+    return rows_response(ClassStudent, students, headers)
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database import get_db
+from models import Assignment, Class, User, UserRole
+from schemas import DashboardSummary
+from auth import require_roles
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    teacher_id: Optional[int] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    # Teachers see their own classes; admins see everyone's or one teacher's
+    if current_user.role == UserRole.TEACHER:
+        if teacher_id is not None and teacher_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to view another teacher's dashboard"
+            )
+        teacher_id = current_user.id
+
+    # Everything comes from the materialized counters; no enrollment or submission rows are read
+    scope = [Class.is_active == True]
+    if teacher_id is not None:
+        scope.append(Class.teacher_id == teacher_id)
+    pending = (
+        select(
+            Assignment.class_id,
+            func.sum(Assignment.submission_count - Assignment.graded_count).label("pending_submissions"),
+        )
+        .where(Assignment.class_id.in_(select(Class.id).where(*scope)))
+        .group_by(Assignment.class_id)
+        .subquery()
+    )
+    pending_submissions = func.coalesce(pending.c.pending_submissions, 0)
+
+    result = await db.execute(
+        select(
+            func.count(Class.id),
+            func.coalesce(func.sum(Class.student_count), 0),
+            func.coalesce(func.sum(pending_submissions), 0),
+            func.coalesce(func.sum(Class.points_earned), 0),
+            func.coalesce(func.sum(Class.points_possible), 0),
+        )
+        .outerjoin(pending, pending.c.class_id == Class.id)
+        .where(*scope)
+    )
+    class_count, student_count, pending_total, earned, possible = result.one()
+
+    result = await db.execute(
+        select(Class, pending_submissions.label("pending_submissions"))
+        .outerjoin(pending, pending.c.class_id == Class.id)
+        .where(*scope)
+        .order_by(Class.name, Class.id)
+        .limit(limit)
+    )
+    classes = [
+        {
+            "id": class_obj.id,
+            "name": class_obj.name,
+            "student_count": class_obj.student_count,
+            "pending_submissions": class_pending,
+            "average_percent": class_obj.average_percent,
+        }
+        for class_obj, class_pending in result.all()
+    ]
+
+    teachers = []
+    if teacher_id is None:
+        # Classes per teacher, busiest first
+        result = await db.execute(
+            select(User.id, User.full_name, User.class_count)
+            .where(User.role == UserRole.TEACHER, User.is_active == True)
+            .order_by(User.class_count.desc(), User.id)
+            .limit(limit)
+        )
+        teachers = result.mappings().all()
+
+    return {
+        "class_count": class_count,
+        "student_count": student_count,
+        "pending_submissions": pending_total,
+        "average_percent": round(100 * earned / possible, 2) if possible else None,
+        "classes": classes,
+        "teachers": teachers,
+    }
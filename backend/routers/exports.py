@@ -0,0 +1,79 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from database import session_scope, stream_partitions
+from models import User, Class, Enrollment
+from auth import require_roles
+from config import EXPORT_BATCH_SIZE
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# Only these columns leave the database; hashed passwords are never exported
+EXPORT_QUERIES = {
+    "users": select(
+        User.id, User.email, User.full_name, User.role, User.is_active, User.created_at, User.updated_at
+    ).order_by(User.id),
+    "classes": select(
+        Class.id, Class.name, Class.subject, Class.description, Class.teacher_id,
+        Class.is_active, Class.created_at, Class.updated_at
+    ).order_by(Class.id),
+    "enrollments": select(
+        Enrollment.id, Enrollment.student_id, Enrollment.class_id, Enrollment.enrolled_at
+    ).order_by(Enrollment.id),
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps({key: _plain(value) for key, value in row.items()}) + "\n" for row in rows
+    ).encode()
+
+def _encode_csv(rows, header=None) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    writer.writerows([_plain(value) for value in row.values()] for row in rows)
+    return buffer.getvalue().encode()
+
+async def export_rows(dataset: str, format: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """Encode a dataset chunk by chunk; memory use is bounded by one partition."""
+    statement = EXPORT_QUERIES[dataset]
+    async with session_scope() as db:
+        if format == "csv":
+            # Emit the header even when the table is empty
+            yield _encode_csv([], header=[column.name for column in statement.selected_columns])
+        async for rows in stream_partitions(db, statement, batch_size):
+            if format == "csv":
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(rows)
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: Literal["users", "classes", "enrollments"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: User = Depends(require_roles(["admin"]))
+):
+    body = export_rows(dataset, format)
+    # CompressionMiddleware compresses the stream chunk by chunk when the client accepts it
+    headers = {"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
@@ -0,0 +1,118 @@
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate
+from hashlib import md5
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from config import LOCAL_STORAGE_URL
+from storage import LocalStorage, get_storage
+
+router = APIRouter(prefix=urlparse(LOCAL_STORAGE_URL).path.rstrip("/") or "/files", tags=["files"])
+
+RANGE_CHUNK_SIZE = 1024 * 1024
+# Stored names are unique per upload, so a file's contents never change
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+class StoredFileResponse(FileResponse):
+    # Larger reads than FileResponse's 64 KB default; fewer thread hops per megabyte sent
+    chunk_size = RANGE_CHUNK_SIZE
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single-range Range header to an inclusive (start, end) byte span.
+
+    Returns None when the whole file should be sent (no header, a malformed one, or
+    several ranges, which browsers do not use for media). Raises 416 when the range
+    lies outside the file.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+def read_range(path: str, start: int, end: int, chunk_size: int = RANGE_CHUNK_SIZE):
+    # A sync generator: StreamingResponse pulls each chunk on the threadpool
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        offset = start
+        while offset <= end:
+            chunk = os.pread(fd, min(chunk_size, end - offset + 1), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+    finally:
+        os.close(fd)
+
+def file_etag(stat_result: os.stat_result) -> str:
+    # Sent on full and partial responses alike so If-Range can be checked against either
+    digest = md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode(), usedforsecurity=False)
+    return f'"{digest.hexdigest()}"'
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"])
+async def serve_file(file_path: str, request: Request):
+    storage = get_storage()
+    path = storage.path_for(file_path) if isinstance(storage, LocalStorage) else None
+    try:
+        stat_result = await run_in_threadpool(os.stat, path) if path else None
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    size = stat_result.st_size
+    etag = file_etag(stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": CACHE_CONTROL, "ETag": etag}
+
+    # If-Range: only honour the range when the client's copy is still current
+    if_range = request.headers.get("if-range")
+    byte_range = None
+    if if_range is None or if_range in (etag, last_modified):
+        byte_range = parse_range(request.headers.get("range"), size)
+
+    if byte_range is None:
+        # Whole-file requests stream straight from disk off the event loop
+        return StoredFileResponse(
+            path, stat_result=stat_result, method=request.method, headers=headers, media_type=media_type
+        )
+
+    start, end = byte_range
+    headers.update({
+        "Content-Range": f"bytes {start}-{end}/{size}",
+        "Content-Length": str(end - start + 1),
+        "Last-Modified": last_modified,
+    })
+    if request.method == "HEAD":
+        return Response(status_code=status.HTTP_206_PARTIAL_CONTENT, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        read_range(path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers=headers,
+        media_type=media_type,
+    )
@@ -0,0 +1,247 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, literal_column, select, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from typing import List, Optional, Tuple
+from database import get_db
+from models import Class, Enrollment, LiveSession, User
+from schemas import LiveSession as LiveSessionSchema, LiveSessionConflict, LiveSessionCreate, LiveSessionUpdate
+from auth import get_current_active_user, require_roles
+from access import visible_class_ids, get_managed_class
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from pagination import NEXT_CURSOR_HEADER, paginate_keyset
+
+router = APIRouter(prefix="/live-sessions", tags=["live sessions"])
+
+def _as_aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; PostgreSQL timestamptz values are already aware
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _period(start, end):
+    return func.tstzrange(start, end, literal_column("'[)'"))
+
+def _overlapping(start: datetime, end: datetime):
+    # The live_sessions_no_overlap constraint's expression, so its GiST index serves the search
+    return _period(LiveSession.scheduled_start, LiveSession.scheduled_end).op("&&")(_period(start, end))
+
+async def find_conflicts(db: AsyncSession, class_obj: Class, start: datetime, end: datetime,
+                         exclude_id: Optional[int] = None) -> List[dict]:
+    """Sessions overlapping [start, end) that the class's teacher or any of its students
+    already attend, from two range-index lookups rather than comparing schedules in Python."""
+    overlapping = [_overlapping(start, end)]
+    if exclude_id is not None:
+        overlapping.append(LiveSession.id != exclude_id)
+    columns = [
+        LiveSession.id, LiveSession.class_id, LiveSession.title,
+        LiveSession.scheduled_start, LiveSession.scheduled_end,
+    ]
+
+    # Anything the teacher runs then, in this class or another they teach
+    result = await db.execute(
+        select(*columns)
+        .join(Class, Class.id == LiveSession.class_id)
+        .where(*overlapping, Class.teacher_id == class_obj.teacher_id, Class.is_active == True)
+    )
+    conflicts = {row.id: dict(row._mapping, teacher=True, students=0) for row in result.all()}
+
+    # Sessions of other classes, with how many of this class's students they enrol
+    classmates = select(Enrollment.student_id).where(Enrollment.class_id == class_obj.id)
+    result = await db.execute(
+        select(*columns, func.count(Enrollment.student_id).label("students"))
+        .join(Class, Class.id == LiveSession.class_id)
+        .join(Enrollment, Enrollment.class_id == LiveSession.class_id)
+        .where(
+            *overlapping,
+            LiveSession.class_id != class_obj.id,
+            Class.is_active == True,
+            Enrollment.student_id.in_(classmates),
+        )
+        .group_by(*columns)
+    )
+    for row in result.all():
+        conflicts.setdefault(row.id, dict(row._mapping, teacher=False))["students"] = row.students
+
+    return sorted(
+        ({"session_id": conflict.pop("id"), **conflict} for conflict in conflicts.values()),
+        key=lambda conflict: (conflict["scheduled_start"], conflict["session_id"])
+    )
+
+async def _check_schedule(db: AsyncSession, class_obj: Class, start: datetime, end: datetime,
+                          exclude_id: Optional[int], allow_student_conflicts: bool) -> Tuple[datetime, datetime]:
+    """Reject an invalid or conflicting schedule; returns the times, timezone-aware, to store."""
+    start, end = _as_aware(start), _as_aware(end)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="scheduled_end must be after scheduled_start"
+        )
+    conflicts = await find_conflicts(db, class_obj, start, end, exclude_id)
+    blocking = [conflict for conflict in conflicts if conflict["teacher"] or not allow_student_conflicts]
+    if blocking:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=jsonable_encoder({
+                "message": "The session overlaps other sessions",
+                "conflicts": [LiveSessionConflict(**conflict) for conflict in blocking],
+            })
+        )
+    return start, end
+
+async def _commit_schedule(db: AsyncSession):
+    # The exclusion constraint still catches a session booked in the same class meanwhile
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if "live_sessions_no_overlap" not in str(e.orig):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another session was just scheduled for this class at that time"
+        )
+
+def upcoming_sessions_query(current_user, now: datetime, limit: int):
+    """The next sessions across the user's classes, reading at most `limit` index entries
+    per class (a LATERAL lookup on class_id, scheduled_end) however long each class's history is."""
+    classes = visible_class_ids(current_user).subquery()
+    per_class = (
+        select(LiveSession)
+        .where(LiveSession.class_id == classes.c[0], LiveSession.scheduled_end > now)
+        .order_by(LiveSession.scheduled_end)
+        .limit(limit)
+        .lateral()
+    )
+    session = aliased(LiveSession, per_class)
+    return (
+        select(session)
+        .select_from(classes)
+        .join(per_class, true())
+        .order_by(session.scheduled_start, session.id)
+        .limit(limit)
+    )
+
+@router.post("/", response_model=LiveSessionSchema)
+async def create_live_session(
+    session_data: LiveSessionCreate,
+    allow_student_conflicts: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    class_obj = await get_managed_class(db, session_data.class_id, current_user, "schedule sessions for")
+    start, end = await _check_schedule(
+        db, class_obj, session_data.scheduled_start, session_data.scheduled_end, None, allow_student_conflicts
+    )
+    
+    db_session = LiveSession(**dict(session_data.dict(), scheduled_start=start, scheduled_end=end))
+    db.add(db_session)
+    await _commit_schedule(db)
+    await db.refresh(db_session)
+    
+    return db_session
+
+@router.get("/upcoming", response_model=List[LiveSessionSchema])
+async def get_upcoming_sessions(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Sessions in progress count as upcoming until they end
+    result = await db.execute(upcoming_sessions_query(current_user, datetime.now(timezone.utc), limit))
+    return result.scalars().all()
+
+@router.get("/", response_model=List[LiveSessionSchema])
+async def get_live_sessions(
+    response: Response,
+    class_id: Optional[List[int]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    query = select(LiveSession).where(LiveSession.class_id.in_(visible_class_ids(current_user)))
+    if class_id:
+        query = query.where(LiveSession.class_id.in_(class_id))
+    sessions, next_cursor = await paginate_keyset(
+        db, query, [LiveSession.scheduled_start, LiveSession.id], cursor, limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return sessions
+
+async def _get_session(db: AsyncSession, session_id: int) -> LiveSession:
+    session = await db.get(LiveSession, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Live session not found"
+        )
+    return session
+
+@router.get("/{session_id}", response_model=LiveSessionSchema)
+async def get_live_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    result = await db.execute(select(LiveSession).where(
+        LiveSession.id == session_id,
+        LiveSession.class_id.in_(visible_class_ids(current_user))
+    ))
+    session = result.scalars().first()
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Live session not found"
+        )
+    return session
+
+@router.put("/{session_id}", response_model=LiveSessionSchema)
+async def update_live_session(
+    session_id: int,
+    session_update: LiveSessionUpdate,
+    allow_student_conflicts: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    session = await _get_session(db, session_id)
+    class_obj = await get_managed_class(db, session.class_id, current_user, "reschedule sessions for")
+    
+    update_data = session_update.dict(exclude_unset=True)
+    if "scheduled_start" in update_data or "scheduled_end" in update_data:
+        if update_data.get("scheduled_start", True) is None or update_data.get("scheduled_end", True) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="scheduled_start and scheduled_end cannot be null"
+            )
+        update_data["scheduled_start"], update_data["scheduled_end"] = await _check_schedule(
+            db, class_obj,
+            update_data.get("scheduled_start", session.scheduled_start),
+            update_data.get("scheduled_end", session.scheduled_end),
+            session.id, allow_student_conflicts
+        )
+    for field, value in update_data.items():
+        setattr(session, field, value)
+    
+    await _commit_schedule(db)
+    await db.refresh(session)
+    
+    return session
+
+@router.delete("/{session_id}")
+async def delete_live_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    session = await _get_session(db, session_id)
+    await get_managed_class(db, session.class_id, current_user, "cancel sessions for")
+    
+    await db.delete(session)
+    await db.commit()
+    
+    return {"message": "Live session deleted successfully"}
+    
\ No newline at end of file
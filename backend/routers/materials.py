@@ -0,0 +1,137 @@
+import os
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_db
+from models import Material, User
+from schemas import Material as MaterialSchema
+from auth import get_current_active_user, require_roles
+from access import visible_class_ids, get_managed_class
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from etags import etag_json_response
+from pagination import NEXT_CURSOR_HEADER, paginate_keyset
+from storage import blob_name_from_url, get_storage
+from uploads import store_upload, discard_upload, release_upload
+
+router = APIRouter(prefix="/materials", tags=["materials"])
+
+def _file_type(filename: str, content_type: Optional[str]) -> str:
+    media = (content_type or "").split("/")[0]
+    if media in ("video", "image", "audio"):
+        return media
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    return extension or "file"
+
+async def _with_download_urls(materials) -> list:
+    # Every URL on the page is resolved in one call; signed URLs come from the storage cache
+    storage = get_storage()
+    names = {material.id: blob_name_from_url(material.file_url) for material in materials}
+    urls = await run_in_threadpool(storage.get_download_urls, list(names.values()))
+    return [
+        MaterialSchema.model_validate(material).model_copy(update={"download_url": urls.get(names[material.id])})
+        for material in materials
+    ]
+
+@router.post("/", response_model=MaterialSchema)
+async def upload_material(
+    class_id: int = Form(...),
+    title: str = Form(...),
+    description: Optional[str] = Form(None),
+    file_type: Optional[str] = Form(None),
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    await get_managed_class(db, class_id, current_user, "add materials to")
+    # End the permission check's transaction so the connection isn't left idle in it
+    # while the file streams in
+    await db.commit()
+    
+    stored = await store_upload(db, file)
+    db_material = Material(
+        title=title,
+        description=description,
+        file_url=stored["url"],
+        file_type=file_type or _file_type(file.filename or "", file.content_type),
+        file_size=stored["size"],
+        content_hash=stored["content_hash"],
+        class_id=class_id
+    )
+    
+    db.add(db_material)
+    try:
+        await db.commit()
+    except Exception:
+        await discard_upload(db, stored)
+        raise
+    await db.refresh(db_material)
+    
+    return (await _with_download_urls([db_material]))[0]
+
+@router.get("/", response_model=List[MaterialSchema])
+async def get_materials(
+    request: Request,
+    class_id: Optional[List[int]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Newest first across every requested class (or every visible class) in one query;
+    # classes the user cannot see are filtered out rather than reported
+    query = select(Material).where(Material.class_id.in_(visible_class_ids(current_user)))
+    if class_id:
+        query = query.where(Material.class_id.in_(class_id))
+    materials, next_cursor = await paginate_keyset(
+        db, query, [Material.uploaded_at, Material.id], cursor, limit, descending=True
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    
+    return etag_json_response(request, await _with_download_urls(materials), headers)
+
+@router.get("/{material_id}", response_model=MaterialSchema)
+async def get_material(
+    material_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    result = await db.execute(select(Material).where(
+        Material.id == material_id,
+        Material.class_id.in_(visible_class_ids(current_user))
+    ))
+    material = result.scalars().first()
+    if not material:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Material not found"
+        )
+    
+    return etag_json_response(request, (await _with_download_urls([material]))[0])
+
+@router.delete("/{material_id}")
+async def delete_material(
+    material_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(["admin", "teacher"]))
+):
+    material = await db.get(Material, material_id)
+    if not material:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Material not found"
+        )
+    
+    await get_managed_class(db, material.class_id, current_user, "delete materials from")
+    
+    content_hash, file_url = material.content_hash, material.file_url
+    await db.delete(material)
+    # Commits; the blob itself is removed only with its last reference
+    await release_upload(db, content_hash)
+    if content_hash is None:
+        # Uploads from before content addressing are never shared
+        await run_in_threadpool(get_storage().delete_file, file_url)
+    
+    return {"message": "Material deleted successfully"}
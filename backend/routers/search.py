@@ -0,0 +1,120 @@
+import html
+import re
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import column, func, literal, literal_column, select, table, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+import database
+from database import get_db
+from models import Class, Material, Note, User
+from schemas import SearchResult
+from auth import get_current_active_user
+from access import visible_class_ids
+from config import SEARCH_LIMIT_DEFAULT, SEARCH_LIMIT_MAX
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+SearchKind = Literal["note", "material", "class"]
+
+# The database marks matches with control characters; the text around them is HTML-escaped
+# before they become <mark> tags (see render_highlight)
+HIGHLIGHT_START, HIGHLIGHT_STOP = "\x02", "\x03"
+# Must match the configuration the search_vector columns were generated with (migration 0007)
+TEXT_SEARCH_CONFIG = literal_column("'english'::regconfig")
+HEADLINE_OPTIONS = f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", MaxWords=30, MinWords=10, MaxFragments=2'
+
+# kind -> (model, title, class id, text to highlight, FTS5 column weights)
+SEARCH_KINDS = {
+    "note": (Note, Note.title, Note.class_id, Note.content, (10.0, 5.0)),
+    "material": (
+        Material, Material.title, Material.class_id,
+        func.coalesce(Material.description, Material.title), (10.0, 5.0)
+    ),
+    "class": (Class, Class.name, Class.id, func.coalesce(Class.description, Class.name), (10.0, 5.0, 2.0)),
+}
+
+def _permitted(kind: str, current_user):
+    # Notes are private to their author; materials and classes follow class visibility
+    if kind == "note":
+        return Note.user_id == current_user.id
+    if kind == "material":
+        return Material.class_id.in_(visible_class_ids(current_user))
+    return Class.id.in_(visible_class_ids(current_user))
+
+def _postgres_search(kind: str, current_user, q: str, limit: int):
+    model, title, class_id, body, _ = SEARCH_KINDS[kind]
+    vector = literal_column(f"{model.__tablename__}.search_vector")
+    query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(vector, query)
+    top = (
+        select(
+            model.id, title.label("title"), class_id.label("class_id"), body.label("body"), rank.label("rank")
+        )
+        .where(vector.op("@@")(query), _permitted(kind, current_user))
+        .order_by(rank.desc(), model.id)
+        .limit(limit)
+        .subquery()
+    )
+    # Headlines are costly, so only the rows that made the cut get one
+    highlight = func.ts_headline(TEXT_SEARCH_CONFIG, top.c.body, query, HEADLINE_OPTIONS)
+    return select(
+        literal(kind).label("kind"), top.c.id, top.c.title, top.c.class_id, top.c.rank,
+        highlight.label("highlight"),
+    )
+
+def render_highlight(text: Optional[str]) -> str:
+    """Stored text is untrusted: escape it for HTML, then wrap the marked matches in <mark>."""
+    escaped = html.escape(text or "")
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+def fts5_query(q: str) -> Optional[str]:
+    """Quote each word so user input can't use FTS5 query syntax; all words must match."""
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+def _sqlite_search(kind: str, current_user, q: str, limit: int):
+    model, title, class_id, body, weights = SEARCH_KINDS[kind]
+    fts_table = table(f"{model.__tablename__}_fts", column("rowid"))
+    fts = literal_column(fts_table.name)  # FTS5 functions and MATCH take the table itself
+    rank = -func.bm25(fts, *weights)  # bm25 is lower-is-better
+    highlight = func.snippet(fts, -1, HIGHLIGHT_START, HIGHLIGHT_STOP, "…", 24)
+    top = (
+        select(
+            model.id, title.label("title"), class_id.label("class_id"), rank.label("rank"),
+            highlight.label("highlight"),
+        )
+        .select_from(model)
+        .join(fts_table, fts_table.c.rowid == model.id)
+        .where(fts.op("MATCH")(fts5_query(q)), _permitted(kind, current_user))
+        .order_by(rank.desc(), model.id)
+        .limit(limit)
+        .subquery()
+    )
+    return select(literal(kind).label("kind"), top.c.id, top.c.title, top.c.class_id, top.c.rank, top.c.highlight)
+
+async def search(db: AsyncSession, current_user, q: str, kinds: List[str], limit: int) -> List[dict]:
+    """Best matches across the requested kinds, highest rank first, in one round trip."""
+    if database.engine.dialect.name == "sqlite":
+        # Local testing without PostgreSQL: the FTS5 tables from models.py
+        if fts5_query(q) is None:
+            return []
+        build = _sqlite_search
+    else:
+        build = _postgres_search
+
+    matches = union_all(*(build(kind, current_user, q, limit) for kind in kinds)).subquery()
+    result = await db.execute(
+        select(matches).order_by(matches.c.rank.desc(), matches.c.kind, matches.c.id).limit(limit)
+    )
+    return [dict(row, highlight=render_highlight(row["highlight"])) for row in result.mappings()]
+
+@router.get("/", response_model=List[SearchResult])
+async def search_everything(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[List[SearchKind]] = Query(None),
+    limit: int = Query(SEARCH_LIMIT_DEFAULT, ge=1, le=SEARCH_LIMIT_MAX),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    kinds = sorted(set(kind)) if kind else list(SEARCH_KINDS)
+    return await search(db, current_user, q, kinds, limit)
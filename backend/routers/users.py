@@ -1,25 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from database import get_db, session_scope
 from models import User, UserRole
 from schemas import User as UserSchema, UserCreate, UserUpdate
-from auth import get_current_active_user, require_roles, get_password_hash
+from auth import get_current_active_user, require_roles, get_password_hash, invalidate_principal
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from pagination import paginate
+from user_import import parse_users, import_users
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/", response_model=List[UserSchema])
-def get_all_users(
-    db: Session = Depends(get_db),
+async def get_all_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(["admin"]))
 ):
-    users = db.query(User).all()
-    return users
+    return await paginate(db, select(User), User, UserSchema, cursor, limit, fields)
+
+@router.post("/import")
+async def import_users_file(
+    file: UploadFile = File(...),
+    current_user: User = Depends(require_roles(["admin"]))
+):
+    # CSV (email, full_name, role, password) or a JSON array of the same fields
+    try:
+        rows = parse_users(await file.read(), file.filename or "")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse import file: {e}"
+        )
+
+    async def progress():
+        async with session_scope() as db:
+            async for event in import_users(db, rows):
+                yield json.dumps(event) + "\n"
+
+    # Progress events are streamed as NDJSON while the import runs
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
 
 @router.get("/{user_id}", response_model=UserSchema)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     # Users can only view their own profile unless they're admin
@@ -29,7 +59,7 @@ def get_user(
             detail="Not enough permissions"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -39,10 +69,10 @@ def get_user(
     return user
 
 @router.put("/{user_id}", response_model=UserSchema)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     # Users can only update their own profile unless they're admin
@@ -52,7 +82,7 @@ def update_user(
             detail="Not enough permissions"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,22 +90,24 @@ def update_user(
         )
     
     # Update user fields
+    previous_email = user.email
     update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_principal(previous_email, user.email)
     
     return user
 
 @router.delete("/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(["admin"]))
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -84,22 +116,29 @@ def delete_user(
     
     # Soft delete by setting is_active to False
     user.is_active = False
-    db.commit()
+    await db.commit()
+    invalidate_principal(user.email)
     
     return {"message": "User deactivated successfully"}
 
 @router.get("/teachers/all", response_model=List[UserSchema])
-def get_all_teachers(
-    db: Session = Depends(get_db),
+async def get_all_teachers(
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    teachers = db.query(User).filter(User.role == UserRole.TEACHER, User.is_active == True).all()
-    return teachers
+    query = select(User).where(User.role == UserRole.TEACHER, User.is_active == True)
+    return await paginate(db, query, User, UserSchema, cursor, limit, fields)
 
 @router.get("/students/all", response_model=List[UserSchema])
-def get_all_students(
-    db: Session = Depends(get_db),
+async def get_all_students(
+    cursor: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(["admin", "teacher"]))
 ):
-    students = db.query(User).filter(User.role == UserRole.STUDENT, User.is_active == True).all()
-    return students
+    query = select(User).where(User.role == UserRole.STUDENT, User.is_active == True)
+    return await paginate(db, query, User, UserSchema, cursor, limit, fields)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from models import UserRole
 
 # User Schemas
@@ -60,6 +60,8 @@ class Class(ClassBase):
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    student_count: int = 0
+    average_percent: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -79,6 +81,7 @@ class Material(MaterialBase):
     file_size: Optional[int] = None
     class_id: int
     uploaded_at: datetime
+    download_url: Optional[str] = None  # Signed when the storage backend requires it
 
     class Config:
         from_attributes = True
@@ -104,6 +107,9 @@ class Assignment(AssignmentBase):
     class_id: int
     teacher_id: int
     created_at: datetime
+    submission_count: int = 0
+    graded_count: int = 0
+    pending_count: int = 0
 
     class Config:
         from_attributes = True
@@ -132,6 +138,54 @@ class Submission(SubmissionBase):
     class Config:
         from_attributes = True
 
+# Gradebook Schemas
+class GradebookAssignment(BaseModel):
+    id: int
+    title: str
+    due_date: datetime
+    max_points: Optional[int] = None
+    submitted: int
+    graded: int
+    missing: int
+    average_grade: Optional[float] = None
+
+class GradebookStudent(BaseModel):
+    id: int
+    full_name: str
+    email: str
+    # One entry per assignment, in the order of Gradebook.assignments; None when ungraded
+    grades: List[Optional[int]]
+    submitted: List[bool]
+    missing: int
+    average_percent: Optional[float] = None
+
+class Gradebook(BaseModel):
+    class_id: int
+    assignments: List[GradebookAssignment]
+    students: List[GradebookStudent]
+    average_percent: Optional[float] = None
+
+# Dashboard Schemas
+class DashboardClass(BaseModel):
+    id: int
+    name: str
+    student_count: int
+    pending_submissions: int
+    average_percent: Optional[float] = None
+
+class DashboardTeacher(BaseModel):
+    id: int
+    full_name: str
+    class_count: int
+
+class DashboardSummary(BaseModel):
+    class_count: int
+    student_count: int
+    pending_submissions: int
+    average_percent: Optional[float] = None
+    classes: List[DashboardClass]
+    teachers: List[DashboardTeacher] = []  # Only for admins viewing every teacher
+
 # Live Session Schemas
 class LiveSessionBase(BaseModel):
     title: str
@@ -141,6 +195,8 @@ class LiveSessionBase(BaseModel):
 
 class LiveSessionCreate(LiveSessionBase):
     class_id: int
+    meeting_url: Optional[str] = None
+    meeting_id: Optional[str] = None
 
 class LiveSessionUpdate(BaseModel):
     title: Optional[str] = None
@@ -164,6 +220,15 @@ class LiveSession(LiveSessionBase):
     class Config:
         from_attributes = True
 
+class LiveSessionConflict(BaseModel):
+    session_id: int
+    class_id: int
+    title: str
+    scheduled_start: datetime
+    scheduled_end: datetime
+    teacher: bool  # The teacher is already teaching then
+    students: int  # Enrolled students who would be double-booked
+
 # Note Schemas
 class NoteBase(BaseModel):
     title: str
@@ -195,6 +260,7 @@ class CalendarEventBase(BaseModel):
     end_time: datetime
     event_type: str
     reference_id: Optional[int] = None
+    recurrence_rule: Optional[str] = None  # e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10
 
 class CalendarEventCreate(CalendarEventBase):
     pass
@@ -206,6 +272,7 @@ class CalendarEventUpdate(BaseModel):
     end_time: Optional[datetime] = None
     event_type: Optional[str] = None
     reference_id: Optional[int] = None
+    recurrence_rule: Optional[str] = None
 
 class CalendarEvent(CalendarEventBase):
     id: int
@@ -215,6 +282,25 @@ class CalendarEvent(CalendarEventBase):
     class Config:
         from_attributes = True
 
+class CalendarFeedItem(BaseModel):
+    kind: Literal["event", "assignment", "live_session"]
+    id: int  # ID of the event, assignment or live session
+    title: str
+    description: Optional[str] = None
+    start_time: datetime  # This occurrence, for recurring events
+    end_time: datetime
+    class_id: Optional[int] = None
+    recurring: bool = False
+
+# Search Schemas
+class SearchResult(BaseModel):
+    kind: Literal["note", "material", "class"]
+    id: int
+    title: str
+    class_id: Optional[int] = None
+    rank: float
+    highlight: str  # HTML: the escaped stored text with matched words wrapped in <mark></mark>
+
 # Enrollment Schemas
 class EnrollmentCreate(BaseModel):
     student_id: int
@@ -228,3 +314,24 @@ class Enrollment(BaseModel):
 
     class Config:
         from_attributes = True
+
+class BulkEnrollmentCreate(BaseModel):
+    student_ids: List[int]
+
+class BulkEnrollmentRow(BaseModel):
+    student_id: int
+    status: Literal["enrolled", "already_enrolled", "not_found", "duplicate"]
+
+class BulkEnrollmentResult(BaseModel):
+    class_id: int
+    enrolled: int
+    already_enrolled: int
+    not_found: int
+    duplicate: int
+    results: List[BulkEnrollmentRow]
+
+class ClassStudent(BaseModel):
+    id: int
+    email: EmailStr
+    full_name: str
+    enrolled_at: datetime
@@ -0,0 +1,62 @@
+import json
+from functools import lru_cache
+from typing import List, Mapping, Optional, Type
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+from config import JSON_BACKEND
+
+try:
+    # orjson is optional; select it with JSON_BACKEND=orjson after comparing with benchmarks/json_responses.py
+    import orjson
+except ImportError:
+    orjson = None
+
+use_orjson = orjson is not None and JSON_BACKEND == "orjson"
+
+if use_orjson:
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+else:
+    DefaultJSONResponse = JSONResponse
+
+def dumps(content) -> bytes:
+    """Compact JSON for plain data: dicts, lists, datetimes, enums and the like."""
+    if use_orjson:
+        # orjson encodes datetimes, enums and UUIDs itself; anything else goes through FastAPI's encoder
+        return orjson.dumps(content, default=jsonable_encoder)
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+
+@lru_cache(maxsize=None)
+def _row_encoder(schema: Type[BaseModel]):
+    # The schema's fields as a TypedDict, which pydantic-core can serialize from plain dicts
+    fields = tuple(schema.model_fields)
+    row_type = TypedDict(schema.__name__, {name: field.annotation for name, field in schema.model_fields.items()})
+    return fields, TypeAdapter(List[row_type])
+
+def _values(row, fields) -> dict:
+    if isinstance(row, Mapping):
+        return {name: row[name] for name in fields}
+    return {name: getattr(row, name) for name in fields}
+
+def dump_rows(schema: Type[BaseModel], rows) -> bytes:
+    """Encode database rows (ORM objects or row mappings) as a JSON list of schema.
+
+    FastAPI would validate every row against the response_model and run the result
+    through jsonable_encoder before encoding it; rows read from our own tables already
+    have the column types, so this copies the schema's fields and encodes them in one pass.
+    """
+    fields, adapter = _row_encoder(schema)
+    values = [_values(row, fields) for row in rows]
+    if use_orjson:
+        return orjson.dumps(values, default=jsonable_encoder)
+    return adapter.dump_json(values)
+
+def dump_row(schema: Type[BaseModel], row) -> bytes:
+    # The one-element list dump_rows encodes, without its brackets
+    return dump_rows(schema, [row])[1:-1]
+
+def rows_response(schema: Type[BaseModel], rows, headers: Optional[dict] = None) -> Response:
+    """A JSON list of schema from database rows; routes keep response_model for the docs."""
+    return Response(content=dump_rows(schema, rows), media_type="application/json", headers=headers)
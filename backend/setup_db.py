@@ -4,13 +4,14 @@ Creates an admin user and sample data
 """
 import asyncio
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine
+from database import SessionLocal
+from migrate import upgrade_database
 from models import Base, User, UserRole
 from auth import get_password_hash
 
 def create_tables():
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Create or upgrade database tables through the Alembic migrations"""
+    upgrade_database()
     print("✅ Database tables created successfully")
 
 def create_admin_user():
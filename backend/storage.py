@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote, unquote
+from config import STORAGE_BACKEND, LOCAL_STORAGE_PATH, LOCAL_STORAGE_URL
+
+class StorageBackend(ABC):
+    """File storage used for uploaded materials and submissions.
+
+    Every method blocks; the API calls them from worker threads (see uploads.store_upload).
+    """
+
+    # Where uploads are spooled while being hashed; None means the system temp directory
+    spool_dir = None
+
+    @abstractmethod
+    def upload_file(self, file_content: bytes, file_name: str, content_type: str = None) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def store_file(self, path: str, blob_name: str, content_type: str = None) -> Optional[str]:
+        """Store a local file under an exact blob name, returning its URL. The file is left in place."""
+
+    @abstractmethod
+    def exists(self, blob_name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete_file(self, file_url: str) -> bool:
+        ...
+
+    @abstractmethod
+    def get_download_url(self, file_path: str) -> Optional[str]:
+        ...
+
+    def get_download_urls(self, file_paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {file_path: self.get_download_url(file_path) for file_path in file_paths}
+
+    def stats(self) -> dict:
+        return {}
+
+class LocalStorage(StorageBackend):
+    # Files live under one directory and are served by the /files route (routers/files.py),
+    # so on-prem deployments need no external object store.
+    def __init__(self, root: str = LOCAL_STORAGE_PATH, base_url: str = LOCAL_STORAGE_URL):
+        self.root = os.path.realpath(root)
+        self.base_url = base_url.rstrip("/")
+        # Spooling inside the root turns store_file into a hard link
+        self.spool_dir = self.root
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Absolute path of a stored file, or None if the name escapes the storage root."""
+        path = os.path.realpath(os.path.join(self.root, name))
+        if os.path.commonpath([self.root, path]) != self.root or path == self.root:
+            return None
+        return path
+
+    def url_for(self, name: str) -> str:
+        return f"{self.base_url}/{quote(name)}"
+
+    def _unique_name(self, file_name: str) -> str:
+        base_name = os.path.basename(file_name.replace("\\", "/")) or "upload"
+        return f"{uuid.uuid4()}_{base_name}"
+
+    def upload_file(self, file_content: bytes, file_name: str, content_type: str = None) -> Optional[str]:
+        # Written to a temporary file first so a failed upload never leaves a partial file behind
+        tmp_path = None
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            name = self._unique_name(file_name)
+            with tempfile.NamedTemporaryFile(dir=self.root, prefix=".upload-", delete=False) as tmp:
+                tmp_path = tmp.name
+                tmp.write(file_content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(self.root, name))
+            return self.url_for(name)
+        except Exception as e:
+            print(f"File upload error: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def store_file(self, path: str, blob_name: str, content_type: str = None) -> Optional[str]:
+        tmp_path = None
+        try:
+            target = self.path_for(blob_name)
+            if target is None:
+                return None
+            # Linked rather than moved, so the same file can be stored again
+            tmp_path = os.path.join(self.root, f".upload-{uuid.uuid4().hex}")
+            try:
+                os.link(path, tmp_path)
+            except OSError:
+                shutil.copyfile(path, tmp_path)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+            return self.url_for(blob_name)
+        except Exception as e:
+            print(f"File upload error: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def exists(self, blob_name: str) -> bool:
+        path = self.path_for(blob_name)
+        return path is not None and os.path.isfile(path)
+
+    def delete_file(self, file_url: str) -> bool:
+        try:
+            path = self.path_for(unquote(file_url.split('/')[-1]))
+            if path is None:
+                return False
+            os.remove(path)
+            return True
+        except Exception as e:
+            print(f"File deletion error: {e}")
+            return False
+
+    def get_download_url(self, file_path: str) -> Optional[str]:
+        path = self.path_for(file_path)
+        if path is None or not os.path.isfile(path):
+            return None
+        return self.url_for(file_path)
+
+def blob_name_from_url(file_url: str) -> str:
+    return unquote(file_url.split("/")[-1])
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage() -> StorageBackend:
+    """The backend selected by STORAGE_BACKEND ("firebase" or "local"), created on first use."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == "local":
+                _storage = LocalStorage()
+            else:
+                from firebase_utils import firebase_storage
+                _storage = firebase_storage
+        return _storage
@@ -0,0 +1,80 @@
+"""
+Test fixtures
+API tests run against a throwaway SQLite database, with the app's sync engine pointed at it,
+so they need neither PostgreSQL nor network access. Tests that check PostgreSQL behaviour
+(query plans) connect to the configured database and skip when it isn't reachable.
+Run from the backend directory: python -m pytest
+"""
+import os
+import tempfile
+
+# Must be set before config is imported
+os.environ.setdefault("DB_MODE", "sync")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+os.environ.setdefault("LOCAL_STORAGE_PATH", tempfile.mkdtemp(prefix="lms-test-files-"))
+os.environ.setdefault("COUNTER_RECONCILE_INTERVAL", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
+import database
+import models
+from auth import principal_cache, token_cache
+from response_cache import MemoryBackend, response_cache
+
+class StatementCounter:
+    """Counts the SQL statements sent to an engine while enabled."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    # Each test starts with empty in-process caches, as the ids in its database repeat
+    principal_cache.clear()
+    token_cache.clear()
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend(1000, 60))
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def sqlite_upserts(sqlite_engine, monkeypatch):
+    """Lets routes that INSERT ... ON CONFLICT run on SQLite, whose insert() has the same API."""
+    import uploads
+    import user_import
+    from routers import assignments, classes
+    for module in (uploads, user_import, assignments, classes):
+        monkeypatch.setattr(module, "pg_insert", sqlite_insert)
+
+@pytest.fixture
+def statements(sqlite_engine):
+    return StatementCounter(sqlite_engine)
+
+@pytest.fixture
+def client(sqlite_engine):
+    import main
+    return TestClient(main.app)
+
+@pytest.fixture
+def make_user(client):
+    def make(email: str, role: str = "student", password: str = "password") -> dict:
+        response = client.post("/auth/register", json={
+            "email": email, "full_name": email.split("@")[0], "role": role, "password": password,
+        })
+        assert response.status_code == 200, response.text
+        user = response.json()
+        response = client.post("/auth/login", json={"email": email, "password": password})
+        assert response.status_code == 200, response.text
+        user["headers"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return user
+    return make
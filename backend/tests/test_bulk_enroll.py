@@ -0,0 +1,52 @@
+import pytest
+
+@pytest.mark.parametrize("content", [
+    "student_id\n1\n".encode("utf-16"),  # Not UTF-8
+    b'"' + b"x" * 200_000 + b'"\n',  # A field over the csv module's size limit
+])
+def test_unreadable_csv_is_a_bad_request(client, make_user, content):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+
+    response = client.post(
+        f"/classes/{class_id}/enroll/bulk/csv",
+        files={"file": ("students.csv", content, "text/csv")},
+        headers=teacher["headers"],
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Could not parse CSV file")
+
+def test_csv_rows_are_enrolled_with_a_result_per_row(client, make_user, sqlite_upserts):
+    teacher = make_user("teacher@example.com", role="teacher")
+    enrolled = make_user("enrolled@example.com")
+    new = make_user("new@example.com")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+    client.post(f"/classes/{class_id}/enroll", json={"student_id": enrolled["id"], "class_id": class_id}, headers=teacher["headers"])
+
+    content = f"name,student_id\nNew,{new['id']}\nAgain,{new['id']}\nEnrolled,{enrolled['id']}\nTeacher,{teacher['id']}\nNobody,9999\n"
+    response = client.post(
+        f"/classes/{class_id}/enroll/bulk/csv",
+        files={"file": ("students.csv", content.encode(), "text/csv")},
+        headers=teacher["headers"],
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert [row["status"] for row in result["results"]] == [
+        "enrolled", "duplicate", "already_enrolled", "not_found", "not_found",
+    ]
+    assert (result["enrolled"], result["duplicate"], result["already_enrolled"], result["not_found"]) == (1, 1, 1, 2)
+
+    class_obj = client.get(f"/classes/{class_id}", headers=teacher["headers"]).json()
+    assert class_obj["student_count"] == 2
+
+def test_invalid_id_is_reported_by_its_row_in_the_file(client, make_user):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+
+    response = client.post(
+        f"/classes/{class_id}/enroll/bulk/csv",
+        files={"file": ("students.csv", b"student_id\n1\nabc\n", "text/csv")},
+        headers=teacher["headers"],
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid student id on row 3: 'abc'"
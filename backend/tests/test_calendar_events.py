@@ -0,0 +1,40 @@
+import pytest
+
+EVENT = {
+    "title": "Study group",
+    "start_time": "2026-03-02T09:00:00Z",
+    "end_time": "2026-03-02T10:00:00Z",
+    "event_type": "personal",
+}
+
+@pytest.mark.parametrize("until", ["20260301", "20260302T085959Z"])
+def test_series_ending_before_it_starts_is_a_bad_request(client, make_user, until):
+    student = make_user("student@example.com")
+
+    response = client.post(
+        "/calendar/events",
+        json=dict(EVENT, recurrence_rule=f"FREQ=WEEKLY;UNTIL={until}"),
+        headers=student["headers"],
+    )
+    assert response.status_code == 400
+    assert "UNTIL" in response.json()["detail"]
+
+def test_series_ending_on_its_first_day_is_accepted(client, make_user):
+    student = make_user("student@example.com")
+
+    response = client.post(
+        "/calendar/events",
+        json=dict(EVENT, recurrence_rule="FREQ=DAILY;UNTIL=20260302"),
+        headers=student["headers"],
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["recurrence_rule"] == "FREQ=DAILY;UNTIL=20260302"
+
+@pytest.mark.parametrize("field", ["title", "start_time", "end_time", "event_type"])
+def test_clearing_a_required_field_is_a_bad_request(client, make_user, field):
+    student = make_user("student@example.com")
+    event_id = client.post("/calendar/events", json=EVENT, headers=student["headers"]).json()["id"]
+
+    response = client.put(f"/calendar/events/{event_id}", json={field: None}, headers=student["headers"])
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"{field} cannot be null"
@@ -0,0 +1,55 @@
+from sqlalchemy import insert
+import database
+from models import Enrollment, User, UserRole
+
+def enroll_new_students(class_id: int, count: int, start: int = 0):
+    with database.SessionLocal() as db:
+        student_ids = db.execute(insert(User).returning(User.id), [
+            {"email": f"student{i}@example.com", "full_name": f"Student {i:03d}", "hashed_password": "x",
+             "role": UserRole.STUDENT}
+            for i in range(start, start + count)
+        ]).scalars().all()
+        db.execute(insert(Enrollment), [{"student_id": student_id, "class_id": class_id} for student_id in student_ids])
+        db.commit()
+
+def test_roster_query_count_does_not_grow_with_class_size(client, make_user, statements):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+    enroll_new_students(class_id, 3)
+    url = f"/classes/{class_id}/students?limit=1000"
+
+    client.get(url, headers=teacher["headers"])  # Warms the principal cache
+    statements.count = 0
+    response = client.get(url, headers=teacher["headers"])
+    assert len(response.json()) == 3
+    small_class = statements.count
+
+    enroll_new_students(class_id, 50, start=3)
+    statements.count = 0
+    response = client.get(url, headers=teacher["headers"])
+    assert len(response.json()) == 53
+    assert statements.count == small_class
+    # The class lookup and one joined roster query
+    assert statements.count == 2
+
+def test_roster_pages_with_a_cursor(client, make_user):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+    enroll_new_students(class_id, 5)
+
+    for order in ("asc", "desc"):
+        names, cursor = [], None
+        while True:
+            params = {"limit": 2, "order": order, **({"cursor": cursor} if cursor else {})}
+            response = client.get(f"/classes/{class_id}/students", params=params, headers=teacher["headers"])
+            assert response.status_code == 200
+            names += [student["full_name"] for student in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        expected = [f"Student {i:03d}" for i in range(5)]
+        assert names == (expected if order == "asc" else expected[::-1])
+
+    response = client.get(f"/classes/{class_id}/students", params={"sort": "enrolled_at"}, headers=teacher["headers"])
+    assert len(response.json()) == 5
+    assert "X-Next-Cursor" not in response.headers
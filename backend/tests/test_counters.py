@@ -0,0 +1,24 @@
+import asyncio
+from sqlalchemy import update
+import database
+from counters import reconcile_counters
+from models import Class
+
+def test_reconciliation_refreshes_cached_class_responses(client, make_user):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+    with database.SessionLocal() as db:
+        db.execute(update(Class).where(Class.id == class_id).values(student_count=7))
+        db.commit()
+    # Cached with the drifted count
+    assert client.get(f"/classes/{class_id}", headers=teacher["headers"]).json()["student_count"] == 7
+    assert client.get("/classes/", headers=teacher["headers"]).json()[0]["student_count"] == 7
+
+    async def reconcile():
+        async with database.session_scope() as db:
+            return await reconcile_counters(db)
+    repaired = asyncio.run(reconcile())
+
+    assert repaired["classes.student_count"] == 1
+    assert client.get(f"/classes/{class_id}", headers=teacher["headers"]).json()["student_count"] == 0
+    assert client.get("/classes/", headers=teacher["headers"]).json()[0]["student_count"] == 0
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+import pytest
+import database
+from models import LiveSession
+
+@pytest.mark.parametrize("field", ["scheduled_start", "scheduled_end"])
+def test_null_schedule_is_a_bad_request(client, make_user, field):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+    # Inserted directly: scheduling checks conflicts with PostgreSQL range operators
+    with database.SessionLocal() as db:
+        session = LiveSession(
+            title="Lecture", class_id=class_id, meeting_url="https://meet.example.com/1",
+            scheduled_start=datetime(2026, 3, 2, 9, tzinfo=timezone.utc),
+            scheduled_end=datetime(2026, 3, 2, 10, tzinfo=timezone.utc),
+        )
+        db.add(session)
+        db.commit()
+        session_id = session.id
+
+    response = client.put(f"/live-sessions/{session_id}", json={field: None}, headers=teacher["headers"])
+    assert response.status_code == 400
+    assert response.json()["detail"] == "scheduled_start and scheduled_end cannot be null"
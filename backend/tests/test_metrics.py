@@ -0,0 +1,9 @@
+def test_metrics_are_for_admins_only(client, make_user):
+    student = make_user("student@example.com")
+    admin = make_user("admin@example.com", role="admin")
+
+    assert client.get("/metrics").status_code == 403  # No credentials
+    assert client.get("/metrics", headers=student["headers"]).status_code == 403
+    response = client.get("/metrics", headers=admin["headers"])
+    assert response.status_code == 200, response.text
+    assert response.json()["database_pool"]["max_overflow"] >= 0
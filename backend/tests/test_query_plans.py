@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+from config import DATABASE_URL
+from query_plans import HOT_QUERIES, explain, indexes_used
+
+# For each hot query, the index (or one of the interchangeable indexes) it must be served by
+EXPECTED_INDEXES = {
+    "enrollment by student and class": [{"uq_enrollments_student_class", "ix_enrollments_class_id_student_id"}],
+    "enrollments by student": [{"uq_enrollments_student_class"}],
+    "enrollments by class": [{"ix_enrollments_class_id_student_id"}],
+    "active classes by teacher": [{"ix_classes_teacher_id_active"}],
+    "assignments by class": [{"ix_assignments_class_id_due_date"}],
+    "submissions by assignment": [{"uq_submissions_assignment_student"}],
+    "submissions by student": [{"ix_submissions_student_id"}],
+    "gradebook submissions by class": [
+        {"ix_assignments_class_id_due_date"}, {"uq_submissions_assignment_student"},
+    ],
+    "calendar events by user and time": [{"ix_calendar_events_user_id_start_time"}],
+    "materials by class": [{"ix_materials_class_id_uploaded_at"}],
+    "live sessions by class": [{"ix_live_sessions_class_id_scheduled_start"}],
+    "calendar feed events": [{"ix_calendar_events_user_id_period"}],
+    "calendar feed live sessions": [{"live_sessions_no_overlap"}],
+    "upcoming sessions for a student": [{"ix_live_sessions_class_id_scheduled_end"}],
+    "overlapping live sessions": [{"live_sessions_no_overlap"}],
+    "note search by user": [{"ix_notes_user_id_search"}],
+    "material search": [{"ix_materials_search"}],
+}
+
+@pytest.fixture(scope="module")
+def postgres():
+    engine = create_engine(DATABASE_URL, connect_args={"connect_timeout": 3})
+    try:
+        connection = engine.connect()
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL is not reachable: {e.orig}")
+    if not inspect(connection).has_table("alembic_version"):
+        connection.close()
+        pytest.skip("The database has no migrations applied; run `alembic upgrade head`")
+    # Empty tables are cheapest to scan; make the planner show the index it would use
+    connection.execute(text("SET enable_seqscan = off"))
+    yield connection
+    connection.close()
+    engine.dispose()
+
+def test_every_hot_query_has_an_expectation():
+    assert set(EXPECTED_INDEXES) == set(HOT_QUERIES)
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_its_index(postgres, name):
+    used = set(indexes_used(explain(postgres, HOT_QUERIES[name])))
+    for expected in EXPECTED_INDEXES[name]:
+        assert used & expected, f"{name} uses {sorted(used) or 'no index'}, expected one of {sorted(expected)}"
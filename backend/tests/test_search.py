@@ -0,0 +1,14 @@
+def test_highlight_escapes_stored_html(client, make_user):
+    teacher = make_user("teacher@example.com", role="teacher")
+    client.post("/classes/", json={
+        "name": "Algebra",
+        "subject": "Maths",
+        "description": '<img src=x onerror="alert(1)"> Algebra for beginners',
+    }, headers=teacher["headers"])
+
+    response = client.get("/search/", params={"q": "beginners", "kind": "class"}, headers=teacher["headers"])
+    assert response.status_code == 200, response.text
+    [result] = response.json()
+    assert "<img" not in result["highlight"]
+    assert "&lt;img src=x onerror=&quot;alert(1)&quot;&gt;" in result["highlight"]
+    assert "<mark>beginners</mark>" in result["highlight"]
@@ -0,0 +1,50 @@
+import database
+import uploads
+from models import StoredBlob
+from storage import blob_name_from_url, get_storage
+
+def upload(client, teacher, class_id, content: bytes):
+    return client.post(
+        "/materials/",
+        data={"class_id": class_id, "title": "Notes"},
+        files={"file": ("notes.pdf", content, "application/pdf")},
+        headers=teacher["headers"],
+    )
+
+def stored_blob(content_hash: str):
+    with database.SessionLocal() as db:
+        return db.get(StoredBlob, content_hash)
+
+def test_identical_uploads_share_one_blob(client, make_user, sqlite_upserts):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+
+    first = upload(client, teacher, class_id, b"lecture notes")
+    second = upload(client, teacher, class_id, b"lecture notes")
+    assert first.status_code == second.status_code == 200, second.text
+    assert first.json()["file_url"] == second.json()["file_url"]
+    blob_name = blob_name_from_url(first.json()["file_url"])
+    assert stored_blob(blob_name.split(".")[0]).ref_count == 2
+
+    for response in (first, second):
+        client.delete(f"/materials/{response.json()['id']}", headers=teacher["headers"])
+    assert not get_storage().exists(blob_name)
+
+def test_blob_released_before_the_reference_is_stored_again(client, make_user, sqlite_upserts, monkeypatch):
+    teacher = make_user("teacher@example.com", role="teacher")
+    class_id = client.post("/classes/", json={"name": "Algebra", "subject": "Maths"}, headers=teacher["headers"]).json()["id"]
+    first = upload(client, teacher, class_id, b"lecture notes").json()
+    blob_name = blob_name_from_url(first["file_url"])
+
+    # The lookup sees the blob, then its last reference is released before the upsert
+    existing_blob_url = uploads._existing_blob_url
+    async def lookup_then_release(db, content_hash):
+        url = await existing_blob_url(db, content_hash)
+        client.delete(f"/materials/{first['id']}", headers=teacher["headers"])
+        return url
+    monkeypatch.setattr(uploads, "_existing_blob_url", lookup_then_release)
+
+    response = upload(client, teacher, class_id, b"lecture notes")
+    assert response.status_code == 200, response.text
+    assert get_storage().exists(blob_name)
+    assert stored_blob(blob_name.split(".")[0]).ref_count == 1
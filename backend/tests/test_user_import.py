@@ -0,0 +1,61 @@
+import json
+import pytest
+import database
+import user_import
+from models import User, UserRole
+
+@pytest.mark.parametrize("filename, content", [
+    ("users.json", b"[1, 2]"),
+    ("users.json", b'{"email": "a@example.com"}'),
+    ("users.csv", "email,full_name\nå@example.com,Å\n".encode("utf-16")),
+    ("users.csv", b'email,full_name\n"' + b"x" * 200_000 + b'",X\n'),
+])
+def test_malformed_import_file_is_a_bad_request(client, make_user, filename, content):
+    admin = make_user("admin@example.com", role="admin")
+
+    response = client.post("/users/import", files={"file": (filename, content)}, headers=admin["headers"])
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Could not parse import file")
+
+def test_import_streams_progress_and_creates_new_users(client, make_user, sqlite_upserts, monkeypatch):
+    admin = make_user("admin@example.com", role="admin")
+    make_user("existing@example.com")
+
+    # An account registered after the import looked up existing emails is skipped by ON CONFLICT
+    hash_passwords = user_import.hash_passwords
+    async def register_then_hash(passwords):
+        with database.SessionLocal() as db:
+            db.add(User(email="late@example.com", full_name="Late", hashed_password="x", role=UserRole.STUDENT))
+            db.commit()
+        return await hash_passwords(passwords)
+    monkeypatch.setattr(user_import, "hash_passwords", register_then_hash)
+
+    content = (
+        "email,full_name,role,password\n"
+        "new@example.com,New Student,student,secret-one\n"
+        "existing@example.com,Existing,student,secret-two\n"
+        "late@example.com,Late,student,secret-three\n"
+        "new@example.com,New Again,student,secret-four\n"
+        "not-an-email,Nobody,student,secret-five\n"
+    )
+    try:
+        response = client.post("/users/import", files={"file": ("users.csv", content.encode())}, headers=admin["headers"])
+    finally:
+        user_import.shutdown_hash_pool()
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["progress", "progress", "done"]
+    assert events[1]["processed"] == 5
+    done = events[-1]
+    assert (done["total"], done["created"], done["skipped_existing"], done["duplicates"], done["invalid"]) == (5, 1, 2, 1, 1)
+    errors = {error["row"]: (error["email"], error["error"]) for error in done["errors"]}
+    assert errors[2] == ("existing@example.com", "Email already registered")
+    assert errors[3] == ("late@example.com", "Email already registered")
+    assert errors[4] == ("new@example.com", "Duplicate email in import")
+    assert errors[5][0] == "not-an-email"
+    assert sorted(errors) == [2, 3, 4, 5]
+
+    response = client.post("/auth/login", json={"email": "new@example.com", "password": "secret-one"})
+    assert response.status_code == 200, response.text
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES, UPLOAD_MAX_CONCURRENCY, UPLOAD_QUEUE_TIMEOUT
+from models import StoredBlob
+from storage import StorageBackend, blob_name_from_url, get_storage
+
+# Uploads run on their own threads so a slow transfer never occupies the request threadpool
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_MAX_CONCURRENCY, thread_name_prefix="upload")
+_upload_slots = asyncio.Semaphore(UPLOAD_MAX_CONCURRENCY)
+
+class UploadTooLarge(Exception):
+    pass
+
+class UploadReader:
+    """Blocking file-like view of an UploadFile for use on a worker thread.
+
+    Every read() pulls the next chunk from the event loop, so at most one chunk is
+    held in memory. The number of bytes read becomes the stored file_size.
+    """
+
+    def __init__(self, upload: UploadFile, loop: asyncio.AbstractEventLoop, max_bytes: int = UPLOAD_MAX_BYTES):
+        self.upload = upload
+        self.loop = loop
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > UPLOAD_CHUNK_SIZE:
+            size = UPLOAD_CHUNK_SIZE
+        chunk = asyncio.run_coroutine_threadsafe(self.upload.read(size), self.loop).result()
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_bytes:
+            raise UploadTooLarge()
+        return chunk
+
+    def tell(self) -> int:
+        return self.bytes_read
+
+def _spool(reader: UploadReader, spool_dir: Optional[str]) -> Tuple[str, str]:
+    """Copy the upload to a temporary file, hashing it on the way. Returns (path, sha256 hex)."""
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(dir=spool_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while True:
+                chunk = reader.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+def blob_name_for(content_hash: str, file_name: str) -> str:
+    # The extension is kept so locally served files get the right content type
+    extension = os.path.splitext(file_name)[1].lower()
+    return f"{content_hash}{extension}"
+
+async def _store(loop, storage: StorageBackend, spool_path: str, blob_name: str, content_type: str) -> str:
+    url = await loop.run_in_executor(_upload_executor, storage.store_file, spool_path, blob_name, content_type)
+    if url is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="File storage is unavailable"
+        )
+    return url
+
+async def _existing_blob_url(db, content_hash: str) -> Optional[str]:
+    result = await db.execute(select(StoredBlob.file_url).where(StoredBlob.content_hash == content_hash))
+    return result.scalar()
+
+async def store_upload(db, upload: UploadFile, storage: StorageBackend = None) -> dict:
+    """Hash an uploaded file while streaming it in and store it under its content address.
+
+    Call it outside a transaction: the blob is written with no transaction open (the
+    lookup's is committed first), then a reference is taken in a new one. The caller
+    should commit that together with the row that uses the blob (Material.content_hash),
+    and call discard_upload if the commit fails. A file whose contents are already
+    stored is not written again.
+
+    Returns the stored file's url, size in bytes, content type, content hash and
+    whether an existing blob was reused.
+    """
+    storage = storage or get_storage()
+    try:
+        await asyncio.wait_for(_upload_slots.acquire(), timeout=UPLOAD_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many uploads in progress, please retry shortly",
+            headers={"Retry-After": str(int(UPLOAD_QUEUE_TIMEOUT))},
+        )
+
+    loop = asyncio.get_running_loop()
+    reader = UploadReader(upload, loop)
+    spool_path = None
+    try:
+        try:
+            spool_path, content_hash = await loop.run_in_executor(_upload_executor, _spool, reader, storage.spool_dir)
+        except UploadTooLarge:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds the {UPLOAD_MAX_BYTES} byte upload limit"
+            )
+
+        blob_name = blob_name_for(content_hash, upload.filename or "")
+        url = await _existing_blob_url(db, content_hash)
+        await db.commit()
+        deduplicated = url is not None
+        if not deduplicated:
+            # Concurrent uploads of the same contents write the same blob name with the same bytes
+            url = await _store(loop, storage, spool_path, blob_name, upload.content_type)
+
+        # A short upsert takes the reference; the row stays locked until the caller commits
+        result = await db.execute(
+            pg_insert(StoredBlob)
+            .values(
+                content_hash=content_hash,
+                file_url=url,
+                file_size=reader.bytes_read,
+                content_type=upload.content_type,
+                ref_count=1,
+            )
+            .on_conflict_do_update(
+                index_elements=[StoredBlob.content_hash],
+                set_={"ref_count": StoredBlob.ref_count + 1},
+            )
+            .returning(StoredBlob.file_url, StoredBlob.ref_count)
+        )
+        url, ref_count = result.one()
+        exists = ref_count > 1 or await loop.run_in_executor(
+            _upload_executor, storage.exists, blob_name_from_url(url)
+        )
+        if not exists:
+            # The last reference was released, deleting the blob, after the lookup or the write above
+            deduplicated = False
+            url = await _store(loop, storage, spool_path, blob_name, upload.content_type)
+            await db.execute(
+                update(StoredBlob).where(StoredBlob.content_hash == content_hash).values(file_url=url)
+            )
+    finally:
+        _upload_slots.release()
+        if spool_path and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+    return {
+        "url": url,
+        "size": reader.bytes_read,
+        "content_type": upload.content_type,
+        "content_hash": content_hash,
+        "deduplicated": deduplicated,
+    }
+
+async def discard_upload(db, stored: dict, storage: StorageBackend = None) -> bool:
+    """Roll back a transaction that called store_upload and delete the blob it wrote.
+
+    Call it when the commit (or anything before it) fails. The blob is kept if another
+    row has referenced it in the meantime. Returns True when the blob was deleted.
+    """
+    await db.rollback()
+    if stored["deduplicated"]:
+        return False
+
+    storage = storage or get_storage()
+    # Inserting waits for any in-flight reference to the same file, then holds the row lock;
+    # an upload that wrote the blob but has yet to take its reference finds it gone and stores it again
+    result = await db.execute(
+        pg_insert(StoredBlob)
+        .values(
+            content_hash=stored["content_hash"],
+            file_url=stored["url"],
+            file_size=stored["size"],
+            content_type=stored["content_type"],
+            ref_count=0,
+        )
+        .on_conflict_do_update(
+            index_elements=[StoredBlob.content_hash],
+            set_={"ref_count": StoredBlob.ref_count},
+        )
+        .returning(StoredBlob.ref_count)
+    )
+    deleted = False
+    if result.scalar() <= 0:
+        deleted = await asyncio.get_running_loop().run_in_executor(_upload_executor, storage.delete_file, stored["url"])
+        await db.execute(
+            delete(StoredBlob).where(StoredBlob.content_hash == stored["content_hash"], StoredBlob.ref_count <= 0)
+        )
+    await db.commit()
+    return deleted
+
+async def release_upload(db, content_hash: Optional[str], storage: StorageBackend = None) -> bool:
+    """Drop one reference to a stored blob and commit, deleting the blob with its last reference.
+
+    Call it in the transaction that removes the referencing row. The blob is deleted
+    while its row is still locked, so a concurrent upload of the same file waits and
+    then stores it again. Returns True when the blob was deleted.
+    """
+    if content_hash is None:
+        await db.commit()
+        return False
+
+    storage = storage or get_storage()
+    result = await db.execute(
+        update(StoredBlob)
+        .where(StoredBlob.content_hash == content_hash)
+        .values(ref_count=StoredBlob.ref_count - 1)
+        .returning(StoredBlob.file_url, StoredBlob.ref_count)
+    )
+    row = result.first()
+    deleted = False
+    if row is not None and row.ref_count <= 0:
+        deleted = await asyncio.get_running_loop().run_in_executor(_upload_executor, storage.delete_file, row.file_url)
+        await db.execute(
+            delete(StoredBlob).where(StoredBlob.content_hash == content_hash, StoredBlob.ref_count <= 0)
+        )
+    await db.commit()
+    return deleted
@@ -0,0 +1,138 @@
+import asyncio
+import csv
+import io
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from auth import get_password_hash
+from config import USER_IMPORT_BATCH_SIZE, USER_IMPORT_HASH_WORKERS
+from models import User
+from schemas import UserCreate
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=USER_IMPORT_HASH_WORKERS)
+        return _hash_pool
+
+def shutdown_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    # Runs in a worker process; one round trip per slice keeps IPC overhead low
+    return [get_password_hash(password) for password in passwords]
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a batch of passwords spread across the import process pool."""
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = _get_hash_pool()
+    slice_size = -(-len(passwords) // USER_IMPORT_HASH_WORKERS)
+    slices = [passwords[i:i + slice_size] for i in range(0, len(passwords), slice_size)]
+    hashed = await asyncio.gather(*[loop.run_in_executor(pool, _hash_many, part) for part in slices])
+    return [value for part in hashed for value in part]
+
+def parse_users(content: bytes, filename: str = "") -> List[dict]:
+    """Read users from a CSV (email, full_name, role, password columns) or a JSON array."""
+    text = content.decode("utf-8-sig")
+    if filename.lower().endswith(".json") or text.lstrip().startswith("["):
+        data = json.loads(text)
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError("JSON import must be an array of user objects")
+        return data
+    try:
+        return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+    except csv.Error as e:
+        raise ValueError(f"invalid CSV: {e}")
+
+async def import_users(db, rows: List[dict], batch_size: int = USER_IMPORT_BATCH_SIZE):
+    """Validate, de-duplicate, hash and insert users, yielding progress events as it goes."""
+    total = len(rows)
+    errors = []
+    candidates = []
+    seen_emails = set()
+    duplicates = 0
+
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            user = UserCreate(**row)
+        except (ValidationError, TypeError) as e:
+            message = e.errors()[0]["msg"] if isinstance(e, ValidationError) else str(e)
+            errors.append({"row": row_number, "email": row.get("email"), "error": message})
+            continue
+        email = user.email
+        if email in seen_emails:
+            duplicates += 1
+            errors.append({"row": row_number, "email": email, "error": "Duplicate email in import"})
+            continue
+        seen_emails.add(email)
+        candidates.append((row_number, email, user))
+
+    # One indexed lookup for every email in the import
+    existing = set()
+    emails = [email for _, email, _ in candidates]
+    for start in range(0, len(emails), 10000):
+        result = await db.execute(select(User.email).where(User.email.in_(emails[start:start + 10000])))
+        existing.update(result.scalars().all())
+
+    to_create = []
+    for row_number, email, user in candidates:
+        if email in existing:
+            errors.append({"row": row_number, "email": email, "error": "Email already registered"})
+        else:
+            to_create.append((row_number, email, user))
+
+    created = 0
+    processed = total - len(to_create)
+    yield {"event": "progress", "total": total, "processed": processed, "created": created}
+
+    for start in range(0, len(to_create), batch_size):
+        batch = to_create[start:start + batch_size]
+        hashed = await hash_passwords([user.password for _, _, user in batch])
+        # Multi-row insert per chunk; accounts registered since the lookup are skipped
+        result = await db.execute(
+            pg_insert(User)
+            .values([
+                {
+                    "email": email,
+                    "full_name": user.full_name,
+                    "hashed_password": hashed_password,
+                    "role": user.role,
+                    "is_active": True,
+                }
+                for (_, email, user), hashed_password in zip(batch, hashed)
+            ])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email)
+        )
+        inserted = set(result.scalars().all())
+        await db.commit()
+        for row_number, email, _ in batch:
+            if email not in inserted:
+                errors.append({"row": row_number, "email": email, "error": "Email already registered"})
+        created += len(inserted)
+        processed += len(batch)
+        yield {"event": "progress", "total": total, "processed": processed, "created": created}
+
+    yield {
+        "event": "done",
+        "total": total,
+        "created": created,
+        "skipped_existing": len(candidates) - created,
+        "duplicates": duplicates,
+        "invalid": total - len(candidates) - duplicates,
+        "errors": errors,
+    }
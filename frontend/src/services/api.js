@@ -36,6 +36,10 @@ api.interceptors.response.use(
   }
 );
 
+// Keyset-paginated list endpoints accept { cursor, limit, fields } params and return
+// the cursor for the next page in the X-Next-Cursor header (null on the last page).
+export const getNextCursor = (response) => response.headers['x-next-cursor'] || null;
+
 export const authAPI = {
   login: (credentials) => api.post('/auth/login', credentials),
   register: (userData) => api.post('/auth/register', userData),
@@ -44,22 +48,101 @@ export const authAPI = {
 };
 
 export const usersAPI = {
-  getAll: () => api.get('/users/'),
+  getAll: (params) => api.get('/users/', { params }),
   getById: (id) => api.get(`/users/${id}`),
   update: (id, userData) => api.put(`/users/${id}`, userData),
   delete: (id) => api.delete(`/users/${id}`),
-  getTeachers: () => api.get('/users/teachers/all'),
-  getStudents: () => api.get('/users/students/all'),
+  getTeachers: (params) => api.get('/users/teachers/all', { params }),
+  getStudents: (params) => api.get('/users/students/all', { params }),
+  importUsers: (file) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return api.post('/users/import', formData, { headers: { 'Content-Type': 'multipart/form-data' } });
+  },
 };
 
 export const classesAPI = {
-  getAll: () => api.get('/classes/'),
+  getAll: (params) => api.get('/classes/', { params }),
   getById: (id) => api.get(`/classes/${id}`),
   create: (classData) => api.post('/classes/', classData),
   update: (id, classData) => api.put(`/classes/${id}`, classData),
   delete: (id) => api.delete(`/classes/${id}`),
   enrollStudent: (classId, studentData) => api.post(`/classes/${classId}/enroll`, studentData),
-  getStudents: (classId) => api.get(`/classes/${classId}/students`),
+  bulkEnroll: (classId, studentIds) => api.post(`/classes/${classId}/enroll/bulk`, { student_ids: studentIds }),
+  getStudents: (classId, params) => api.get(`/classes/${classId}/students`, { params }),
+};
+
+export const materialsAPI = {
+  // classIds may hold one or many class ids; they are sent as repeated class_id params
+  getAll: (classIds, params) => api.get('/materials/', {
+    params: { ...params, class_id: classIds },
+    paramsSerializer: { indexes: null },
+  }),
+  getById: (id) => api.get(`/materials/${id}`),
+  upload: (classId, { title, description, file }) => {
+    const formData = new FormData();
+    formData.append('class_id', classId);
+    formData.append('title', title);
+    if (description) formData.append('description', description);
+    formData.append('file', file);
+    return api.post('/materials/', formData, { headers: { 'Content-Type': 'multipart/form-data' } });
+  },
+  delete: (id) => api.delete(`/materials/${id}`),
+};
+
+export const assignmentsAPI = {
+  getAll: (classIds, params) => api.get('/assignments/', {
+    params: { ...params, class_id: classIds },
+    paramsSerializer: { indexes: null },
+  }),
+  getById: (id) => api.get(`/assignments/${id}`),
+  create: (assignmentData) => api.post('/assignments/', assignmentData),
+  update: (id, assignmentData) => api.put(`/assignments/${id}`, assignmentData),
+  delete: (id) => api.delete(`/assignments/${id}`),
+  submit: (id, { textContent, file }) => {
+    const formData = new FormData();
+    if (textContent) formData.append('text_content', textContent);
+    if (file) formData.append('file', file);
+    return api.post(`/assignments/${id}/submissions`, formData, { headers: { 'Content-Type': 'multipart/form-data' } });
+  },
+  getSubmissions: (id, params) => api.get(`/assignments/${id}/submissions`, { params }),
+  gradeSubmission: (id, submissionId, gradeData) => api.put(`/assignments/${id}/submissions/${submissionId}`, gradeData),
+  getGradebook: (classId) => api.get(`/assignments/gradebook/${classId}`),
+};
+
+export const liveSessionsAPI = {
+  getAll: (classIds, params) => api.get('/live-sessions/', {
+    params: { ...params, class_id: classIds },
+    paramsSerializer: { indexes: null },
+  }),
+  getUpcoming: (params) => api.get('/live-sessions/upcoming', { params }),
+  getById: (id) => api.get(`/live-sessions/${id}`),
+  create: (sessionData, { allowStudentConflicts = false } = {}) => api.post('/live-sessions/', sessionData, {
+    params: { allow_student_conflicts: allowStudentConflicts },
+  }),
+  update: (id, sessionData, { allowStudentConflicts = false } = {}) => api.put(`/live-sessions/${id}`, sessionData, {
+    params: { allow_student_conflicts: allowStudentConflicts },
+  }),
+  delete: (id) => api.delete(`/live-sessions/${id}`),
+};
+
+export const calendarAPI = {
+  getFeed: (from, to) => api.get('/calendar/feed', { params: { from, to } }),
+  exportIcs: (params) => api.get('/calendar/feed.ics', { params, responseType: 'blob' }),
+  createEvent: (eventData) => api.post('/calendar/events', eventData),
+  updateEvent: (id, eventData) => api.put(`/calendar/events/${id}`, eventData),
+  deleteEvent: (id) => api.delete(`/calendar/events/${id}`),
+};
+
+export const searchAPI = {
+  search: (q, params) => api.get('/search/', {
+    params: { ...params, q },
+    paramsSerializer: { indexes: null },
+  }),
+};
+
+export const dashboardAPI = {
+  getSummary: (params) => api.get('/dashboard/summary', { params }),
 };
 
 export default api;